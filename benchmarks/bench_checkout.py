@@ -0,0 +1,84 @@
+"""
+Concurrent checkout benchmark.
+
+Spawns 1..N terminal processes that each run process_transaction in a loop
+against the configured database (local MySQL or the SQLite backend,
+seeded with install_db.py) and reports checkouts/sec.
+
+    python -m benchmarks.bench_checkout --terminals 1 2 4 8 16 --seconds 10
+"""
+import argparse
+import multiprocessing as mp
+import random
+import time
+
+from db_manager import open_db
+from sizes import backfill, sizes_for
+
+BENCH_PREFIX = "BENCH-"
+
+
+def setup(n_skus, stock):
+    db = open_db(pool_size=1)
+    with db._cursor() as (conn, cur):
+        cur.execute("UPDATE inventory SET qty_in_stock = %s WHERE item_name LIKE %s", (stock, BENCH_PREFIX + "%"))
+        cur.execute("UPDATE inventory_sizes SET qty = %s WHERE sku IN (SELECT sku FROM inventory WHERE item_name LIKE %s)", (stock, BENCH_PREFIX + "%"))
+        cur.execute("SELECT COUNT(*) FROM inventory WHERE item_name LIKE %s", (BENCH_PREFIX + "%",))
+        have = cur.fetchone()[0]
+        rows = [(f"{BENCH_PREFIX}{i:05d}", "Uppers", 25.00, stock, "", "benchmark item") for i in range(have, n_skus)]
+        if rows:
+            cur.executemany("INSERT INTO inventory (item_name, category, unit_price, qty_in_stock, image_path, details) VALUES (%s, %s, %s, %s, %s, %s)", rows)
+            backfill(cur)
+        cur.execute("SELECT sku FROM inventory WHERE item_name LIKE %s ORDER BY sku LIMIT %s", (BENCH_PREFIX + "%", n_skus))
+        skus = [(r[0], sizes_for("Uppers")) for r in cur.fetchall()]
+        cur.execute("SELECT uid FROM staff_users ORDER BY uid LIMIT 1")
+        staff_id = cur.fetchone()[0]
+        cur.execute("SELECT client_id FROM clients ORDER BY client_id LIMIT 1")
+        client_id = cur.fetchone()[0]
+        conn.commit()
+    db.close()
+    return skus, staff_id, client_id
+
+
+def terminal(skus, staff_id, client_id, lines, deadline, results):
+    db = open_db(pool_size=1)
+    rnd = random.Random()
+    ok = failed = 0
+    while time.time() < deadline:
+        cart = [(sku, rnd.choice(sizes), rnd.randint(1, 3)) for sku, sizes in rnd.sample(skus, min(lines, len(skus)))]
+        done, _ = db.process_transaction(staff_id, client_id, cart, "Cash")
+        if done: ok += 1
+        else: failed += 1
+    db.close()
+    results.put((ok, failed))
+
+
+def run(terminals, seconds, skus, staff_id, client_id, lines):
+    results = mp.Queue()
+    deadline = time.time() + seconds
+    procs = [mp.Process(target=terminal, args=(skus, staff_id, client_id, lines, deadline, results)) for _ in range(terminals)]
+    for p in procs: p.start()
+    totals = [results.get() for _ in procs]
+    for p in procs: p.join()
+    ok = sum(t[0] for t in totals)
+    failed = sum(t[1] for t in totals)
+    return ok / seconds, failed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--terminals", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--skus", type=int, default=200, help="size of the benchmark catalogue (smaller = more contention)")
+    ap.add_argument("--lines", type=int, default=4, help="distinct SKUs per cart")
+    args = ap.parse_args()
+
+    skus, staff_id, client_id = setup(args.skus, 1_000_000)
+    print(f"{'terminals':>9} {'checkouts/s':>12} {'failed':>7}")
+    for n in args.terminals:
+        rate, failed = run(n, args.seconds, skus, staff_id, client_id, args.lines)
+        print(f"{n:>9} {rate:>12.1f} {failed:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Synthetic data for benchmarks.
+
+Tops the configured database up to N generated SKUs (spread over
+Uppers/Lowers/Shoes), M clients and K historical sales with their
+sales_items. Rows are written with explicit keys in batched multi-row
+inserts, and running it again only adds what is missing.
+
+    python -m benchmarks.datagen --skus 5000 --clients 2000 --sales 20000
+"""
+import argparse
+import datetime
+import random
+
+from db_manager import open_db
+from sizes import backfill, sizes_for
+
+GEN_PREFIX = "GEN-"
+BATCH = 1000
+CATEGORIES = {
+    "Uppers": ["Tee", "Hoodie", "Polo", "Jacket", "Shirt", "Sweater"],
+    "Lowers": ["Jeans", "Chinos", "Joggers", "Shorts", "Cargo Pants"],
+    "Shoes": ["Runners", "Sneakers", "Boots", "Loafers", "Slides"],
+}
+COLOURS = ["Black", "White", "Navy", "Olive", "Grey", "Red", "Sand", "Denim", "Forest", "Rust"]
+TIERS = ["Regular"] * 6 + ["Bronze"] * 2 + ["Silver", "Gold"]
+PAYMENTS = ["Cash", "Card", "Online"]
+
+
+def _max_id(cur, table, col):
+    cur.execute(f"SELECT COALESCE(MAX({col}), 0) FROM {table}")
+    return cur.fetchone()[0]
+
+
+def _count(cur, sql, params=()):
+    cur.execute(sql, params)
+    return cur.fetchone()[0]
+
+
+def _insert(cur, sql, rows):
+    for i in range(0, len(rows), BATCH):
+        cur.executemany(sql, rows[i:i + BATCH])
+
+
+def generate(db, skus=1000, clients=500, sales=5000, stock=1_000_000, seed=42, progress=print):
+    """Returns {'skus': [...], 'sizes': {sku: [...]}, 'clients': [...], 'staff': [...]} for the generated data set."""
+    rnd = random.Random(seed)
+    with db._cursor() as (conn, cur):
+        # --- INVENTORY ---
+        have = _count(cur, "SELECT COUNT(*) FROM inventory WHERE item_name LIKE %s", (GEN_PREFIX + "%",))
+        next_sku = _max_id(cur, "inventory", "sku") + 1
+        rows = []
+        for i in range(have, skus):
+            cat = rnd.choice(list(CATEGORIES))
+            kind = rnd.choice(CATEGORIES[cat])
+            colour = rnd.choice(COLOURS)
+            price = round(rnd.uniform(9, 180), 2)
+            rows.append((next_sku + len(rows), f"{GEN_PREFIX}{i:06d} {colour} {kind}", cat, price, stock, "",
+                         f"{colour} {kind.lower()} in cotton blend"))
+        _insert(cur, "INSERT INTO inventory (sku, item_name, category, unit_price, qty_in_stock, image_path, details) VALUES (%s, %s, %s, %s, %s, %s, %s)", rows)
+        if rows:
+            backfill(cur, after_sku=next_sku - 1)
+            db._bump_inventory_version(cur)
+        conn.commit()
+        progress(f" + {len(rows)} products")
+
+        cur.execute("SELECT sku, unit_price, category FROM inventory WHERE item_name LIKE %s ORDER BY sku", (GEN_PREFIX + "%",))
+        catalogue = cur.fetchall()[:skus]
+
+        # --- CLIENTS ---
+        have = _count(cur, "SELECT COUNT(*) FROM clients WHERE full_name LIKE %s", ("GEN %",))
+        next_id = _max_id(cur, "clients", "client_id") + 1
+        rows = [(next_id + n, f"GEN Client {i:06d}", f"98{i:08d}", f"client{i}@example.com", rnd.choice(TIERS))
+                for n, i in enumerate(range(have, clients))]
+        _insert(cur, "INSERT INTO clients (client_id, full_name, contact_no, email_addr, client_type) VALUES (%s, %s, %s, %s, %s)", rows)
+        conn.commit()
+        progress(f" + {len(rows)} clients")
+
+        cur.execute("SELECT client_id FROM clients WHERE full_name LIKE %s ORDER BY client_id", ("GEN %",))
+        client_ids = [r[0] for r in cur.fetchall()][:clients]
+        cur.execute("SELECT uid FROM staff_users ORDER BY uid")
+        staff_ids = [r[0] for r in cur.fetchall()]
+
+        # --- SALES HISTORY ---
+        have = _count(cur, "SELECT COUNT(*) FROM sales_log")
+        next_sale = _max_id(cur, "sales_log", "sale_id") + 1
+        now = datetime.datetime.now().replace(microsecond=0)
+        heads, lines = [], []
+        for n in range(max(0, sales - have)):
+            sale_id = next_sale + n
+            picked = rnd.sample(catalogue, min(rnd.randint(1, 4), len(catalogue)))
+            subtotal = 0
+            for sku, price, cat in picked:
+                qty = rnd.randint(1, 3)
+                subtotal += float(price) * qty
+                lines.append((sale_id, sku, qty, rnd.choice(sizes_for(cat)), price))
+            subtotal = round(subtotal, 2)
+            discount = round(subtotal * rnd.choice([0, 0, 0, 0.05, 0.10]), 2)
+            when = now - datetime.timedelta(seconds=rnd.randint(0, 365 * 86400))
+            heads.append((sale_id, rnd.choice(staff_ids), rnd.choice(client_ids) if client_ids else None,
+                          subtotal, discount, round(subtotal - discount, 2), rnd.choice(PAYMENTS), when.strftime("%Y-%m-%d %H:%M:%S")))
+            if len(heads) >= BATCH:
+                _write_sales(cur, heads, lines)
+                conn.commit()
+                heads, lines = [], []
+        if heads:
+            _write_sales(cur, heads, lines)
+            conn.commit()
+        progress(f" + {max(0, sales - have)} sales")
+
+    # History was written directly, so bring the reporting aggregates in line
+    from reports import rebuild
+    rebuild(db)
+
+    return {'skus': [r[0] for r in catalogue], 'sizes': {r[0]: sizes_for(r[2]) for r in catalogue},
+            'clients': client_ids, 'staff': staff_ids}
+
+
+def _write_sales(cur, heads, lines):
+    cur.executemany("INSERT INTO sales_log (sale_id, staff_id, client_id, subtotal, discount_amount, grand_total, payment_method, sale_date) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)", heads)
+    _insert(cur, "INSERT INTO sales_items (sale_id, sku, qty, item_size, sold_at_price) VALUES (%s, %s, %s, %s, %s)", lines)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--skus", type=int, default=1000)
+    ap.add_argument("--clients", type=int, default=500)
+    ap.add_argument("--sales", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    db = open_db()
+    generate(db, args.skus, args.clients, args.sales, seed=args.seed)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
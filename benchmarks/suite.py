@@ -0,0 +1,218 @@
+"""
+Benchmark suite.
+
+Generates a synthetic data set (benchmarks.datagen), then times the hot
+paths and writes the results as JSON so runs can be compared release to
+release:
+
+  fetch_inventory      cold (cache invalidated) and warm
+  search               first page and full keyset walk for a few queries
+  checkout             single-terminal latency, then concurrent checkouts/s
+  order_details        get_order_details on random historical sales
+  ui                   StorePage/CartPage refresh on a withdrawn Tk root
+
+    python -m benchmarks.suite --backend sqlite --skus 5000 --sales 20000 --out bench.json
+    xvfb-run python -m benchmarks.suite --backend mysql ...
+
+--backend sqlite runs against a fresh embedded database file (a temporary
+one unless --sqlite-path is given); --backend mysql uses the configured
+server. The ui section is skipped, with the reason recorded, when there is
+no display or PIL is missing.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+TIMED_REPEAT = 20
+
+
+def summarize(samples):
+    """Latency summary in milliseconds."""
+    ms = sorted(s * 1000 for s in samples)
+    pick = lambda q: round(ms[min(len(ms) - 1, int(q * len(ms)))], 3)
+    return {'n': len(ms), 'mean_ms': round(sum(ms) / len(ms), 3), 'min_ms': round(ms[0], 3),
+            'p50_ms': pick(0.50), 'p95_ms': pick(0.95), 'max_ms': round(ms[-1], 3)}
+
+
+def timed(fn, repeat=TIMED_REPEAT, before=None):
+    samples = []
+    for _ in range(repeat):
+        if before: before()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+# --- CASES ---
+def bench_inventory(db, repeat):
+    cache = db.inventory_cache
+    return {
+        'rows': len(db.fetch_inventory()),
+        'cold': timed(db.fetch_inventory, repeat, before=cache.invalidate),
+        'warm': timed(db.fetch_inventory, repeat),
+    }
+
+
+def bench_search(db, repeat, queries=("black", "tee", "run", "navy jeans", "GEN-0001")):
+    out = {}
+    for q in queries:
+        def walk():
+            page, n = None, 0
+            while True:
+                rows, page = db.search_inventory(q, limit=60, after=page)
+                n += len(rows)
+                if page is None: return n
+        out[q] = {'first_page': timed(lambda: db.search_inventory(q, limit=60), repeat),
+                  'full_walk': timed(walk, max(1, repeat // 4)), 'matches': walk()}
+    return out
+
+
+def bench_checkout(db, data, repeat, rnd):
+    def one():
+        cart = [(sku, rnd.choice(data['sizes'][sku]), rnd.randint(1, 2)) for sku in rnd.sample(data['skus'], min(3, len(data['skus'])))]
+        ok, msg = db.process_transaction(data['staff'][0], rnd.choice(data['clients']), cart, "Cash")
+        if not ok: raise RuntimeError(msg)
+    return timed(one, repeat)
+
+
+def bench_concurrent(data, terminals, seconds):
+    from benchmarks.bench_checkout import run
+    out = {}
+    for n in terminals:
+        rate, failed = run(n, seconds, [(sku, data['sizes'][sku]) for sku in data['skus']], data['staff'][0], data['clients'][0], 4)
+        out[str(n)] = {'checkouts_per_s': round(rate, 1), 'failed': failed}
+    return out
+
+
+def bench_order_details(db, repeat, rnd):
+    with db._cursor() as (conn, cur):
+        cur.execute("SELECT MIN(sale_id), MAX(sale_id) FROM sales_log")
+        lo, hi = cur.fetchone()
+    return timed(lambda: db.get_order_details(rnd.randint(lo, hi)), repeat)
+
+
+def bench_ui(db, data, repeat):
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        return {'skipped': f"no display: {e}"}
+    try:
+        from store_front import StorePage, CartPage
+    except ImportError as e:
+        root.destroy()
+        return {'skipped': f"missing dependency: {e}"}
+
+    from cart import Cart
+    from db_worker import DBWorker
+
+    root.withdraw()
+    controller = type("HeadlessController", (), {})()
+    controller.db, controller.worker, controller.cart = db, DBWorker(root), Cart()
+    controller.show_frame = lambda name: None
+    for sku in data['skus'][:20]:
+        controller.cart.add(sku, data['sizes'][sku][0], 1)
+
+    def settle():
+        # Run the Tk loop until every worker result has been rendered
+        while controller.worker._pending:
+            root.update()
+        root.update_idletasks()
+
+    out = {}
+    try:
+        store, cart_page = StorePage(root, controller), CartPage(root, controller)
+        store.pack(); cart_page.pack()
+        refresh = lambda page: (page.refresh(), settle())
+        out['store_refresh_cold'] = timed(lambda: refresh(store), repeat, before=db.inventory_cache.invalidate)
+        out['store_refresh_warm'] = timed(lambda: refresh(store), repeat)
+        out['cart_refresh'] = timed(lambda: refresh(cart_page), repeat)
+        store.thumbs.shutdown()
+    finally:
+        controller.worker.shutdown()
+        root.destroy()
+    return out
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite")
+    ap.add_argument("--sqlite-path", help="database file for --backend sqlite (default: fresh temp file)")
+    ap.add_argument("--skus", type=int, default=2000)
+    ap.add_argument("--clients", type=int, default=1000)
+    ap.add_argument("--sales", type=int, default=10000)
+    ap.add_argument("--repeat", type=int, default=TIMED_REPEAT)
+    ap.add_argument("--terminals", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--seconds", type=float, default=5, help="duration of each concurrent checkout run")
+    ap.add_argument("--skip", nargs="*", default=[], choices=["inventory", "search", "checkout", "concurrent", "order_details", "ui"])
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", help="write JSON here instead of stdout")
+    args = ap.parse_args()
+
+    # Set before open_db so the terminal processes of the concurrent run see the same database
+    os.environ['SMARTFIT_DB'] = args.backend
+    if args.backend == "sqlite":
+        os.environ['SMARTFIT_SQLITE_PATH'] = args.sqlite_path or os.path.join(tempfile.mkdtemp(prefix="smartfit-bench-"), "bench.db")
+
+    from db_manager import open_db
+    from benchmarks.datagen import generate
+
+    db = open_db()
+    log = lambda msg: print(msg, file=sys.stderr)
+    start = time.perf_counter()
+    data = generate(db, args.skus, args.clients, args.sales, seed=args.seed, progress=log)
+    rnd = random.Random(args.seed)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec="seconds"), 'commit': git_commit(),
+            'backend': args.backend, 'python': platform.python_version(), 'platform': platform.platform(),
+            'skus': args.skus, 'clients': args.clients, 'sales': args.sales, 'repeat': args.repeat,
+            'datagen_s': round(time.perf_counter() - start, 2),
+        },
+        'results': {},
+    }
+    cases = [
+        ("inventory", lambda: bench_inventory(db, args.repeat)),
+        ("search", lambda: bench_search(db, args.repeat)),
+        ("checkout", lambda: bench_checkout(db, data, args.repeat, rnd)),
+        ("concurrent", lambda: bench_concurrent(data, args.terminals, args.seconds)),
+        ("order_details", lambda: bench_order_details(db, args.repeat, rnd)),
+        ("ui", lambda: bench_ui(db, data, args.repeat)),
+    ]
+    for name, case in cases:
+        if name in args.skip: continue
+        log(f"[BENCH] {name}")
+        report['results'][name] = case()
+    db.close()
+
+    from instrumentation import metrics
+    report['sql'] = {k: v for k, v in metrics.snapshot()['timers'].items() if k.startswith("sql:")}
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+        log(f"[OK] results written to {args.out}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
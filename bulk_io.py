@@ -0,0 +1,254 @@
+"""
+Bulk inventory import/export (CSV).
+
+Import streams the file row by row, validates each row against the
+inventory schema and upserts in multi-row statements (BATCH_ROWS per
+statement), committing every COMMIT_ROWS rows. Rows carrying a `sku`
+update that product or create it with that key; rows without one are
+inserted as new products. Invalid rows are skipped and reported with
+their line number; they never abort the load.
+
+The optional `sizes` column ("M:3 L:5 XL:0") sets per-size stock, for new
+and existing products alike. Without it qty_in_stock is split over the
+category's sizes, unless an existing product's sizes already add up to it.
+
+Export reads through a streaming cursor with fetchmany(), so memory stays
+flat however large the catalogue is.
+
+    python bulk_io.py import stock.csv
+    python bulk_io.py export stock.csv
+"""
+import csv
+import os
+import time
+from decimal import Decimal, InvalidOperation
+
+import sizes
+
+COLUMNS = ["sku", "item_name", "category", "unit_price", "qty_in_stock", "image_path", "details"]
+CSV_COLUMNS = COLUMNS + ["sizes"]
+CATEGORIES = ("Uppers", "Lowers", "Shoes")
+BATCH_ROWS = 500
+COMMIT_ROWS = 5000
+MAX_ERRORS = 200 # detailed errors kept in the report; the count is always exact
+MAX_PRICE = Decimal("99999999.99") # DECIMAL(10, 2)
+
+
+class RowError(ValueError):
+    pass
+
+
+def validate(rec):
+    """
+    CSV dict -> ((sku or None, name, category, price, qty, image_path, details), {size: qty} or None);
+    raises RowError.
+    """
+    name = (rec.get('item_name') or "").strip()
+    if not name: raise RowError("item_name is required")
+    if len(name) > 100: raise RowError("item_name longer than 100 characters")
+
+    cat = (rec.get('category') or "").strip()
+    if cat not in CATEGORIES: raise RowError(f"category must be one of {', '.join(CATEGORIES)}")
+
+    try:
+        price = Decimal((rec.get('unit_price') or "").strip())
+        if not price.is_finite(): raise InvalidOperation # NaN/Infinity parse but compare as errors
+        price = price.quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise RowError(f"unit_price {rec.get('unit_price')!r} is not a number")
+    if not (0 <= price <= MAX_PRICE): raise RowError("unit_price out of range")
+
+    try:
+        qty = int((rec.get('qty_in_stock') or "0").strip())
+    except ValueError:
+        raise RowError(f"qty_in_stock {rec.get('qty_in_stock')!r} is not a whole number")
+    if qty < 0: raise RowError("qty_in_stock cannot be negative")
+
+    img = (rec.get('image_path') or "").strip()
+    if len(img) > 255: raise RowError("image_path longer than 255 characters")
+
+    sku = (rec.get('sku') or "").strip()
+    if sku:
+        if not sku.isdigit() or int(sku) <= 0: raise RowError(f"sku {sku!r} is not a positive integer")
+        sku = int(sku)
+    else:
+        sku = None
+
+    stock = None
+    if (rec.get('sizes') or "").strip():
+        try:
+            stock = sizes.parse_sizes(rec['sizes'])
+        except ValueError as e:
+            raise RowError(str(e))
+        qty = sum(stock.values())
+
+    return (sku, name, cat, price, qty, img, (rec.get('details') or "").strip()), stock
+
+
+class _Counting:
+    """Line iterator over a text file that tracks how many characters were read (for progress)."""
+    def __init__(self, f):
+        self.f, self.read = f, 0
+    def __iter__(self):
+        for line in self.f:
+            self.read += len(line)
+            yield line
+
+
+def import_inventory_csv(db, path, progress=None, batch_rows=BATCH_ROWS, commit_rows=COMMIT_ROWS):
+    """
+    Upsert every valid row of `path`. progress(report) is called after each
+    commit with the running report; returns the final one:
+    {'read', 'upserted', 'inserted', 'invalid', 'errors': [(line, msg)], 'seconds', 'fraction'}
+    """
+    report = {'read': 0, 'upserted': 0, 'inserted': 0, 'invalid': 0, 'errors': [], 'seconds': 0.0, 'fraction': 0.0}
+    size = max(1, os.path.getsize(path))
+    start = time.perf_counter()
+
+    keyed_cols = COLUMNS
+    new_cols = COLUMNS[1:]
+    upsert_tail = db._upsert_clause("sku", new_cols)
+
+    def flush(cur, rows, cols, tail):
+        if not rows: return
+        marks = "(" + ", ".join(["%s"] * len(cols)) + ")"
+        sql = f"INSERT INTO inventory ({', '.join(cols)}) VALUES " + ", ".join([marks] * len(rows)) + tail
+        cur.execute(sql, [v for row in rows for v in row])
+
+    def flush_keyed(cur, rows, stocks):
+        flush(cur, rows, keyed_cols, upsert_tail)
+        current = sizes.read(cur, [r[0] for r in rows if stocks[r[0]] is None])
+        ledger = {}
+        for sku, _, cat, _, qty, _, _ in rows:
+            stock = stocks[sku] if stocks[sku] is not None else sizes.resolve(current.get(sku), qty, cat)
+            if stock is not None: ledger[sku] = stock
+        sizes.write(cur, ledger)
+
+    def settle(cur):
+        # New products (no sku in the file) were inserted in file order above max_sku:
+        # those with a sizes column get that ledger, the rest split qty_in_stock
+        given = state['fresh']
+        if any(stock for _, stock in given):
+            cur.execute("SELECT sku FROM inventory WHERE sku > %s ORDER BY sku", (state['max_sku'],))
+            new = [r[0] for r in cur.fetchall()]
+            if len(new) == len(given):
+                sizes.write(cur, {sku: stock for sku, (_, stock) in zip(new, given) if stock})
+            else: # someone else added products meanwhile, so the new SKUs cannot be matched to rows
+                for line, stock in given:
+                    if stock and len(report['errors']) < MAX_ERRORS:
+                        report['errors'].append((line, "added, but sizes ignored (catalogue changed during the import); stock split evenly"))
+        sizes.backfill(cur, after_sku=state['max_sku'])
+        cur.execute("SELECT COALESCE(MAX(sku), 0) FROM inventory")
+        state['max_sku'], state['fresh'] = cur.fetchone()[0], []
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        src = _Counting(f)
+        reader = csv.DictReader(src)
+        missing = {"item_name", "category", "unit_price"} - set(reader.fieldnames or [])
+        if missing:
+            raise RowError(f"missing column(s): {', '.join(sorted(missing))}")
+
+        with db._cursor() as (conn, cur):
+            cur.execute("SELECT COALESCE(MAX(sku), 0) FROM inventory")
+            state = {'max_sku': cur.fetchone()[0], 'fresh': []} # fresh: (line, sizes or None) per new row
+            keyed, fresh, stocks, pending = [], [], {}, 0
+            for rec in reader:
+                report['read'] += 1
+                try:
+                    row, stock = validate(rec)
+                except RowError as e:
+                    report['invalid'] += 1
+                    if len(report['errors']) < MAX_ERRORS:
+                        report['errors'].append((reader.line_num, str(e)))
+                    continue
+
+                if row[0] is None:
+                    fresh.append(row[1:])
+                    state['fresh'].append((reader.line_num, stock))
+                else:
+                    keyed.append(row)
+                    stocks[row[0]] = stock # a sku repeated in one batch: the later row wins, as in the upsert
+                pending += 1
+
+                if len(keyed) >= batch_rows:
+                    flush_keyed(cur, keyed, stocks); report['upserted'] += len(keyed); keyed, stocks = [], {}
+                if len(fresh) >= batch_rows:
+                    flush(cur, fresh, new_cols, ""); report['inserted'] += len(fresh); fresh = []
+                if pending >= commit_rows:
+                    settle(cur)
+                    db._bump_inventory_version(cur)
+                    conn.commit()
+                    pending = 0
+                    report['fraction'] = src.read / size
+                    report['seconds'] = time.perf_counter() - start
+                    if progress: progress(dict(report))
+
+            if keyed: flush_keyed(cur, keyed, stocks); report['upserted'] += len(keyed)
+            flush(cur, fresh, new_cols, ""); report['inserted'] += len(fresh)
+            settle(cur)
+            db._bump_inventory_version(cur)
+            conn.commit()
+
+    db.inventory_cache.invalidate()
+    report['fraction'] = 1.0
+    report['seconds'] = time.perf_counter() - start
+    if progress: progress(dict(report))
+    return report
+
+
+def export_inventory_csv(db, path, progress=None, fetch_size=2000):
+    """Write the whole catalogue (with per-size stock) to `path`; returns the number of products written."""
+    written = 0
+    tmp = path + ".part"
+    with db._cursor() as (conn, cur):
+        cur.execute("SELECT COUNT(*) FROM inventory")
+        total = max(1, cur.fetchone()[0])
+        # One row per (product, size), in sku order, folded back into one CSV row per product
+        cur.execute("SELECT i.sku, i.item_name, i.category, i.unit_price, i.image_path, i.details, z.size, z.qty "
+                    "FROM inventory i LEFT JOIN inventory_sizes z ON z.sku = i.sku ORDER BY i.sku")
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            out = csv.writer(f)
+            out.writerow(CSV_COLUMNS)
+
+            def emit(head, stock):
+                stock = sizes.ordered(head[2], stock)
+                sku, name, cat, price, img, details = head
+                out.writerow([sku, name, cat, price, sum(stock.values()), img, details, sizes.format_sizes(stock)])
+
+            head, stock = None, {}
+            while True:
+                rows = cur.fetchmany(fetch_size)
+                if not rows: break
+                for *cols, size, qty in rows:
+                    if head is None or cols[0] != head[0]:
+                        if head is not None:
+                            emit(head, stock); written += 1
+                        head, stock = cols, {}
+                    if size is not None: stock[size] = qty
+                if progress: progress({'written': written, 'fraction': min(1.0, written / total)})
+            if head is not None:
+                emit(head, stock); written += 1
+    os.replace(tmp, path)
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    from db_manager import open_db
+
+    ap = argparse.ArgumentParser(description="SmartFit inventory CSV import/export")
+    ap.add_argument("action", choices=["import", "export"])
+    ap.add_argument("path")
+    args = ap.parse_args()
+
+    db = open_db()
+    if args.action == "import":
+        show = lambda r: print(f"\r {r['fraction']:6.1%}  {r['upserted'] + r['inserted']} rows, {r['invalid']} invalid", end="")
+        r = import_inventory_csv(db, args.path, progress=show)
+        print(f"\n[OK] {r['upserted']} upserted, {r['inserted']} inserted, {r['invalid']} invalid in {r['seconds']:.1f}s")
+        for line, msg in r['errors'][:20]:
+            print(f" - line {line}: {msg}")
+    else:
+        n = export_inventory_csv(db, args.path)
+        print(f"[OK] {n} products written to {args.path}")
+    db.close()
@@ -0,0 +1,110 @@
+from decimal import Decimal
+
+CENTS = Decimal("0.01")
+
+
+def cart_lines(cart):
+    """Accept a Cart, its to_payload() list, or a legacy {'SKU_SIZE': qty} dict; return (sku, size, qty) lines."""
+    if hasattr(cart, 'to_payload'):
+        return cart.to_payload()
+    if not isinstance(cart, dict):
+        return [(int(sku), str(size), int(qty)) for sku, size, qty in cart]
+
+    lines = []
+    for key, qty in cart.items():
+        # Parse "SKU_SIZE" -> SKU, SIZE
+        if "_" in str(key):
+            sku_str, size_val = str(key).split("_", 1)
+            sku = int(sku_str)
+        else:
+            sku = int(key)
+            size_val = "N/A"
+        lines.append((sku, size_val, int(qty)))
+    return lines
+
+
+class Cart:
+    """
+    Shopping cart keyed by (sku, size).
+
+    Keeps a running per-SKU quantity (so stock checks across sizes are O(1)),
+    the total unit count for the cart badge, and a subtotal that is updated
+    on every change instead of being recomputed from inventory.
+    """
+
+    def __init__(self):
+        self.lines = {}    # (sku, size) -> qty
+        self.per_sku = {}  # sku -> qty across all sizes
+        self.prices = {}   # sku -> unit price (Decimal)
+        self.units = 0
+        self.subtotal = Decimal("0.00")
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    def __iter__(self):
+        """Yield (sku, size, qty) lines in insertion order."""
+        for (sku, size), qty in self.lines.items():
+            yield sku, size, qty
+
+    def usage(self, sku):
+        return self.per_sku.get(int(sku), 0)
+
+    def qty(self, sku, size):
+        return self.lines.get((int(sku), str(size)), 0)
+
+    def price(self, sku):
+        return self.prices.get(int(sku), Decimal("0.00"))
+
+    def line_total(self, sku, size):
+        return (self.price(sku) * self.qty(sku, size)).quantize(CENTS)
+
+    def add(self, sku, size, qty=1, price=None):
+        sku = int(sku)
+        if price is not None:
+            self.reprice(sku, price)
+        self.set_qty(sku, size, self.qty(sku, size) + qty)
+
+    def set_qty(self, sku, size, qty):
+        sku, size = int(sku), str(size)
+        key = (sku, size)
+        delta = max(qty, 0) - self.lines.get(key, 0)
+        if qty <= 0:
+            self.lines.pop(key, None)
+        else:
+            self.lines[key] = qty
+
+        self.units += delta
+        self.subtotal += self.price(sku) * delta
+        self.per_sku[sku] = self.per_sku.get(sku, 0) + delta
+        if not self.per_sku[sku]:
+            del self.per_sku[sku]
+            self.prices.pop(sku, None)
+
+    def remove(self, sku, size):
+        self.set_qty(sku, size, 0)
+
+    def reprice(self, sku, price):
+        """Set the unit price for a SKU, adjusting the cached subtotal for lines already held."""
+        sku = int(sku)
+        new = Decimal(str(price))
+        self.subtotal += (new - self.prices.get(sku, new)) * self.per_sku.get(sku, 0)
+        self.prices[sku] = new
+
+    def clear(self):
+        self.__init__()
+
+    # --- SERIALIZATION ---
+    def to_payload(self):
+        """Compact [(sku, size, qty), ...] form consumed by SmartFitDB.process_transaction."""
+        return [(sku, size, qty) for (sku, size), qty in self.lines.items()]
+
+    @classmethod
+    def from_payload(cls, payload, prices=None):
+        cart = cls()
+        for sku, size, qty in payload:
+            cart.add(sku, size, qty, (prices or {}).get(sku))
+        return cart
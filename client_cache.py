@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+
+
+class ClientCache:
+    """
+    Small LRU of the clients this terminal has recently looked up, keyed by
+    client_id. Checkout pricing, receipts and the typeahead's "recent"
+    list read from it, and it is what offline sales fall back to when the
+    database cannot be searched.
+    """
+
+    def __init__(self, capacity=500):
+        self.capacity = capacity
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def put(self, rows):
+        with self._lock:
+            for r in rows:
+                self._rows[r['client_id']] = r
+                self._rows.move_to_end(r['client_id'])
+            while len(self._rows) > self.capacity:
+                self._rows.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def get(self, client_id):
+        with self._lock:
+            row = self._rows.get(client_id)
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            self._rows.move_to_end(client_id)
+            self.stats['hits'] += 1
+            return row
+
+    def tier(self, client_id):
+        with self._lock:
+            row = self._rows.get(client_id)
+        return row['client_type'] if row else None
+
+    def name(self, client_id):
+        with self._lock:
+            row = self._rows.get(client_id)
+        return row['full_name'] if row else None
+
+    def recent(self, limit=10):
+        with self._lock:
+            return list(reversed(self._rows.values()))[:limit]
+
+    def search(self, query, limit=20):
+        """Same matching rules as SmartFitDB.search_clients, over the cached rows only."""
+        q = (query or "").strip().lower()
+        with self._lock:
+            rows = list(reversed(self._rows.values()))
+        hits = [r for r in rows if not q or any((r.get(c) or "").lower().startswith(q)
+                                                for c in ('full_name', 'contact_no', 'email_addr'))]
+        return hits[:limit]
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, size=len(self._rows))
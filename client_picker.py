@@ -0,0 +1,99 @@
+import tkinter as tk
+
+
+class ClientPicker(tk.Frame):
+    """
+    Typeahead client selector for checkout.
+
+    Keystrokes are debounced, then SmartFitDB.search_clients runs on the DB
+    worker (newer searches supersede older ones). An empty box lists this
+    terminal's recent clients without touching the database. The last row
+    of a partial page is "More results...", which fetches the next page.
+    """
+    SEARCH_DELAY_MS = 250
+    PAGE = 15
+    MORE = "More results..."
+
+    def __init__(self, parent, controller, on_select, **kw):
+        super().__init__(parent, **kw)
+        self.controller = controller
+        self.on_select = on_select
+        self.rows = []
+        self.next_page = None
+        self.search_job = None
+        self.query = ""
+
+        self.var = tk.StringVar()
+        self.entry = tk.Entry(self, textvariable=self.var, font=("Arial", 11))
+        self.entry.pack(fill="x", pady=5)
+        tk.Label(self, text="Search by name, phone or e-mail", bg=kw.get('bg', "white"), fg="gray",
+                 font=("Arial", 8)).pack(anchor="w")
+        self.listbox = tk.Listbox(self, height=6, font=("Arial", 10), activestyle="none", exportselection=False)
+
+        self.entry.bind("<KeyRelease>", self.on_key)
+        self.entry.bind("<Down>", lambda e: self.move(1))
+        self.entry.bind("<Up>", lambda e: self.move(-1))
+        self.entry.bind("<Return>", lambda e: self.choose())
+        self.entry.bind("<Escape>", lambda e: self.hide())
+        self.entry.bind("<FocusIn>", lambda e: self.search_now())
+        self.listbox.bind("<ButtonRelease-1>", lambda e: self.choose())
+
+    def on_key(self, e):
+        if e.keysym in ("Up", "Down", "Return", "Escape"): return
+        if self.search_job: self.after_cancel(self.search_job)
+        self.search_job = self.after(self.SEARCH_DELAY_MS, self.search_now)
+
+    def search_now(self):
+        self.search_job = None
+        self.query = self.var.get().strip()
+        db = self.controller.db
+        if not self.query:
+            self.show(db.clients.recent(self.PAGE), None)
+            return
+        self.controller.worker.submit(db.search_clients, self.query, limit=self.PAGE,
+                                      on_done=lambda res: self.show(*res), key="client-search")
+
+    def load_more(self):
+        query, shown = self.query, self.rows
+        self.controller.worker.submit(self.controller.db.search_clients, query, limit=self.PAGE, after=self.next_page,
+                                      on_done=lambda res: self.show(shown + res[0], res[1]), key="client-search")
+
+    def show(self, rows, next_page):
+        self.rows, self.next_page = rows, next_page
+        self.listbox.delete(0, tk.END)
+        for c in rows:
+            self.listbox.insert(tk.END, f"{c['full_name']}  ·  {c['contact_no'] or '-'}  ({c['client_type']})")
+        if next_page:
+            self.listbox.insert(tk.END, self.MORE)
+        if rows:
+            self.listbox.pack(fill="x")
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(0)
+        else:
+            self.hide()
+
+    def hide(self):
+        self.listbox.pack_forget()
+
+    def move(self, step):
+        if not self.listbox.winfo_ismapped(): return
+        cur = self.listbox.curselection()
+        idx = min(max((cur[0] if cur else -1) + step, 0), self.listbox.size() - 1)
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(idx)
+        self.listbox.see(idx)
+
+    def choose(self):
+        cur = self.listbox.curselection()
+        if not cur: return
+        if cur[0] >= len(self.rows):
+            self.load_more()
+            return
+        self.select(self.rows[cur[0]])
+
+    def select(self, client):
+        """Show `client` as chosen (also used after a quick-add) and notify the page."""
+        self.controller.db.clients.put([client])
+        self.var.set(client['full_name'])
+        self.hide()
+        self.on_select(client)
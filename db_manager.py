@@ -1,171 +1,841 @@
-import mysql.connector
-from mysql.connector import Error
+import configparser
+import os
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import mysql.connector
+    from mysql.connector import Error
+except ImportError: # SQLite-only installs
+    mysql = None
+
+    class Error(Exception):
+        def __init__(self, msg=None, errno=None, values=None, sqlstate=None):
+            super().__init__(msg)
+            self.msg, self.errno, self.sqlstate = msg, errno, sqlstate
+
+from cart import cart_lines
+from instrumentation import metrics, timed, TimedCursor
+from client_cache import ClientCache
+from inventory_cache import InventoryCache
+from offline_journal import OfflineJournal, new_ref, is_local_ref, quote_from_entry
+from pricing import PricingEngine, Quote
+from reports import record_sale
+import sizes
+
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "smartfit.ini")
+
+
+def load_db_config(path=CONFIG_FILE):
+    """
+    Backend selection. Reads [database] from smartfit.ini if present;
+    SMARTFIT_DB / SMARTFIT_SQLITE_PATH environment variables win.
+
+        [database]
+        backend = sqlite          ; or mysql (default)
+        sqlite_path = smartfit.db
+    """
+    parser = configparser.ConfigParser()
+    parser.read(path)
+    section = parser['database'] if parser.has_section('database') else {}
+    return {
+        'backend': os.environ.get('SMARTFIT_DB', section.get('backend', 'mysql')).strip().lower(),
+        'sqlite_path': os.environ.get('SMARTFIT_SQLITE_PATH', section.get('sqlite_path', 'smartfit.db')),
+    }
+
+
+def open_db(**kwargs):
+    """Return the configured backend: SmartFitDB (MySQL) or SQLiteDB."""
+    cfg = load_db_config()
+    if cfg['backend'] == 'sqlite':
+        from sqlite_backend import SQLiteDB
+        return SQLiteDB(cfg['sqlite_path'], **kwargs)
+    return SmartFitDB(**kwargs)
+
+
+class ConnectionPool:
+    """Bounded pool of database connections shared by every SmartFitDB call."""
+
+    def __init__(self, connect, size=5, timeout=10.0, ping_after=30.0):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after # seconds idle before a connection is health-checked
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'pings': 0, 'waits': 0, 'wait_time': 0.0, 'opened': 0}
+
+    def _bump(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _open(self):
+        try:
+            conn = self.connect()
+        except Exception:
+            metrics.incr("db.connect_failures")
+            raise
+        self._bump('opened')
+        metrics.incr("db.connections_opened")
+        return conn
+
+    def _healthy(self, conn, idle_for):
+        # Recently used connections are trusted; stale ones get a ping (and reconnect if dropped)
+        if idle_for < self.ping_after:
+            return True
+        self._bump('pings')
+        try:
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            return True
+        except Error:
+            return False
+
+    def acquire(self):
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            self._bump('waits')
+            if not self._slots.acquire(timeout=self.timeout):
+                raise Error(msg=f"Connection pool exhausted ({self.size} in use)")
+        self._bump('wait_time', time.perf_counter() - start)
+
+        try:
+            while True:
+                try:
+                    conn, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    self._bump('misses')
+                    return self._open()
+                if self._healthy(conn, time.monotonic() - last_used):
+                    self._bump('hits')
+                    return conn
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        try:
+            if broken:
+                self._discard(conn)
+                return
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put((conn, time.monotonic()))
+        except Error:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def _discard(self, conn):
+        try: conn.close()
+        except Error: pass
+
+    def close(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+
+class StockConflict(Exception):
+    """A sale cannot be applied because the stock it needs is not there."""
+
 
 class SmartFitDB:
-    def __init__(self):
+    # Errors after which a pooled connection is not trusted again
+    CONNECTION_ERRORS = (mysql.connector.InterfaceError, mysql.connector.OperationalError) if mysql else ()
+    # ...and client error codes for an unreachable server or a dropped link, which the
+    # C extension raises as a plain DatabaseError (e.g. "2003 (HY000): Can't connect")
+    CONNECTION_ERRNOS = {2002, 2003, 2006, 2013, 2055}
+    DIALECT = "mysql"
+    # After a connection failure, skip the database for this long before trying again
+    OFFLINE_RETRY = 15.0
+    # inventory_changes keeps about this many versions; a terminal further behind reloads the table
+    CHANGE_RETENTION = 5000
+    # More changed SKUs than this since our version and a full reload is cheaper than the delta
+    MAX_DELTA_SKUS = 1000
+
+    def __init__(self, pool_size=5, pool_timeout=10.0, cache_ttl=5.0, journal_path=None):
         self.config = {
             'user': 'root',
             'password': '',
             'host': 'localhost',
             'database': 'smartfit_apparel',
-            'raise_on_warnings': True
+            'raise_on_warnings': True,
+            'connection_timeout': 5
         }
+        self.pool = ConnectionPool(self._connect, size=pool_size, timeout=pool_timeout)
+        self.inventory_cache = InventoryCache(ttl=cache_ttl)
+        self.pricing = PricingEngine(self)
+        self.journal = OfflineJournal(journal_path) if journal_path else OfflineJournal()
+        self.offline_until = 0.0
+        # Recently served clients / staff names, so checkout and receipts keep working offline
+        self.clients = ClientCache()
+        self._clients = None
+        self._staff_names = {}
+        self._row_alias = None # server takes INSERT ... AS new (MySQL 8.0.20+); known after the first connect
+        metrics.add_source("pool", self.pool_stats)
+        metrics.add_source("inventory_cache", lambda: dict(self.inventory_cache.stats))
+        metrics.add_source("client_cache", self.clients.snapshot)
+        metrics.add_source("offline_journal", lambda: {'pending': len(self.journal.pending()), 'conflicts': len(self.journal.conflicts())})
 
     def _connect(self):
-        return mysql.connector.connect(**self.config)
+        conn = mysql.connector.connect(**self.config)
+        if self._row_alias is None:
+            self._row_alias = "mariadb" not in conn.get_server_info().lower() and conn.get_server_version() >= (8, 0, 20)
+        return conn
+
+    @contextmanager
+    def session(self):
+        """Borrow a pooled connection for the duration of the block."""
+        conn = self.pool.acquire()
+        broken = False
+        try:
+            yield conn
+        except Exception as e:
+            broken = self.is_connection_error(e)
+            raise
+        finally:
+            self.pool.release(conn, broken)
+
+    @contextmanager
+    def _cursor(self, dictionary=False):
+        with self.session() as conn:
+            cur = TimedCursor(conn.cursor(dictionary=dictionary), metrics)
+            try:
+                yield conn, cur
+            finally:
+                cur.close()
+
+    def is_connection_error(self, e):
+        """True when `e` means the database could not be reached (go offline), not a failed statement."""
+        return isinstance(e, self.CONNECTION_ERRORS) or (isinstance(e, Error) and getattr(e, 'errno', None) in self.CONNECTION_ERRNOS)
+
+    @property
+    def offline(self):
+        return time.monotonic() < self.offline_until
+
+    def _went_offline(self):
+        metrics.incr("db.went_offline")
+        self.offline_until = time.monotonic() + self.OFFLINE_RETRY
 
+    def pool_stats(self):
+        return dict(self.pool.stats)
+
+    def close(self):
+        self.pool.close()
+
+    @timed("db.verify_login")
     def verify_login(self, u, p):
-        conn = self._connect()
-        cur = conn.cursor(dictionary=True)
         try:
-            cur.execute("SELECT * FROM staff_users WHERE username = %s AND pass_hash = %s", (u, p))
-            return cur.fetchone()
-        except Error:
+            with self._cursor(dictionary=True) as (conn, cur):
+                cur.execute("SELECT * FROM staff_users WHERE username = %s AND pass_hash = %s", (u, p))
+                user = cur.fetchone()
+                if user: self._staff_names[user['uid']] = user['display_name']
+                return user
+        except Error as e:
+            metrics.error("verify_login", e)
             return None
-        finally:
-            cur.close(); conn.close()
 
+    @timed("db.fetch_inventory")
     def fetch_inventory(self):
-        conn = self._connect()
-        cur = conn.cursor(dictionary=True)
+        cache = self.inventory_cache
+        if cache.is_fresh() or (self.offline and cache.loaded):
+            return cache.rows()
+
         try:
-            cur.execute("SELECT * FROM inventory ORDER BY item_name")
+            with self._cursor(dictionary=True) as (conn, cur):
+                if cache.loaded:
+                    # Stale: pull only the rows changed since our version
+                    since = cache.version
+                    version, rows, removed = self._changes_since(cur, since)
+                    if rows is not None and cache.apply(rows, removed, since, version):
+                        return cache.rows()
+                else:
+                    version = self._inventory_version(cur)
+                cur.execute("SELECT * FROM inventory ORDER BY item_name")
+                cache.load(self._attach_sizes(cur, cur.fetchall(), everything=True), version)
+        except Error as e:
+            if not self.is_connection_error(e): raise
+            self._went_offline()
+            if not cache.loaded: raise
+        return cache.rows()
+
+    @timed("db.fetch_inventory_since")
+    def fetch_inventory_since(self, version):
+        """
+        Inventory changes after `version`: (current_version, rows, removed_skus).
+        rows and removed_skus are None when the change feed cannot cover the
+        gap (pruned, a bulk write, too many SKUs) and the whole table has to
+        be reloaded instead.
+        """
+        with self._cursor(dictionary=True) as (conn, cur):
+            return self._changes_since(cur, version)
+
+    @timed("db.poll_inventory")
+    def poll_inventory(self):
+        """
+        Bring the cached catalogue up to date for the UI poller. Returns the
+        (rows, removed_skus) that were applied - ([], []) when nothing changed,
+        which costs one primary-key lookup - or None when the catalogue was
+        reloaded wholesale.
+        """
+        cache = self.inventory_cache
+        if self.offline: return [], []
+        if not cache.loaded:
+            self.fetch_inventory()
+            return None
+        since = cache.version
+        try:
+            with self._cursor(dictionary=True) as (conn, cur):
+                version, rows, removed = self._changes_since(cur, since)
+        except Error as e:
+            if not self.is_connection_error(e): raise
+            self._went_offline()
+            return [], []
+        if rows is None:
+            cache.invalidate()
+            self.fetch_inventory()
+            return None
+        if not cache.apply(rows, removed, since, version):
+            return [], [] # a local write moved the cache on meanwhile; the next poll catches up
+        return rows, removed
+
+    def _changes_since(self, cur, version):
+        current = self._inventory_version(cur)
+        if current == version:
+            return current, [], []
+        cur.execute("SELECT version, sku FROM inventory_changes WHERE version > %s AND version <= %s ORDER BY version",
+                    (version, current))
+        feed = cur.fetchall()
+        skus = sorted({r['sku'] for r in feed})
+        # The feed must start right after `version`, with no "everything changed" (sku 0) marker
+        if not feed or feed[0]['version'] != version + 1 or skus[0] == 0 or len(skus) > self.MAX_DELTA_SKUS:
+            return current, None, None
+        cur.execute(f"SELECT * FROM inventory WHERE sku IN ({', '.join(['%s'] * len(skus))})", skus)
+        rows = self._attach_sizes(cur, cur.fetchall())
+        found = {r['sku'] for r in rows}
+        return current, rows, [sku for sku in skus if sku not in found]
+
+    def get_item(self, sku):
+        self.fetch_inventory()
+        return self.inventory_cache.get(sku)
+
+    # Change counter: a single row bumped by every inventory write, so terminals
+    # can tell whether their cached catalogue is stale with one PK lookup, and
+    # inventory_changes says which SKUs each bump touched.
+    def _inventory_version(self, cur):
+        cur.execute("SELECT version FROM inventory_version WHERE id = 1")
+        row = cur.fetchone()
+        return row['version'] if row else 0
+
+    def _bump_inventory_version(self, cur, skus=None):
+        """
+        Run last before commit so the counter row is locked as briefly as
+        possible. `skus` are the products written; None (bulk writes) tells
+        other terminals to reload the whole table.
+        """
+        version = self._next_inventory_version(cur)
+        keys = sorted({int(sku) for sku in skus}) if skus else [0]
+        cur.execute("INSERT INTO inventory_changes (version, sku) VALUES " + ", ".join(["(%s, %s)"] * len(keys)),
+                    [v for sku in keys for v in (version, sku)])
+        if version % 500 == 0:
+            cur.execute("DELETE FROM inventory_changes WHERE version <= %s", (version - self.CHANGE_RETENTION,))
+        return version
+
+    def _next_inventory_version(self, cur):
+        cur.execute("UPDATE inventory_version SET version = LAST_INSERT_ID(version + 1) WHERE id = 1")
+        return cur.lastrowid
+
+    def _reload_row(self, cur, sku):
+        cur.execute("SELECT * FROM inventory WHERE sku = %s", (sku,))
+        row = cur.fetchone()
+        return self._attach_sizes(cur, [row])[0] if row else None
+
+    def _attach_sizes(self, cur, rows, everything=False):
+        """Overlay the per-size ledger: row['sizes'] = {size: qty}, row['qty_in_stock'] = their total."""
+        if not rows: return rows
+        if everything:
+            ledger = {}
+            cur.execute("SELECT sku, size, qty FROM inventory_sizes")
+            for r in cur.fetchall():
+                ledger.setdefault(r['sku'], {})[r['size']] = r['qty']
+        else:
+            ledger = sizes.read(cur, [r['sku'] for r in rows])
+        for r in rows:
+            r['sizes'] = sizes.ordered(r['category'], ledger.get(r['sku'], {}))
+            r['qty_in_stock'] = sum(r['sizes'].values())
+        return rows
+
+    @timed("db.search_inventory")
+    def search_inventory(self, query="", category=None, limit=60, after=None):
+        """
+        Indexed, keyset-paginated catalogue search over name/category/details.
+
+        Returns (rows, next_page); pass next_page back as `after` to get the
+        following page, it is None once the results are exhausted.
+        """
+        where, params = [], []
+        words = re.findall(r"\w+", query or "")
+        if words:
+            clause, args = self._text_match(words)
+            where.append(clause)
+            params += args
+        if category:
+            where.append("category = %s")
+            params.append(category)
+        if after:
+            where.append("(item_name > %s OR (item_name = %s AND sku > %s))")
+            params += [after[0], after[0], after[1]]
+
+        sql = "SELECT * FROM inventory"
+        if where: sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY item_name, sku LIMIT %s"
+        params.append(int(limit) + 1)
+
+        with self._cursor(dictionary=True) as (conn, cur):
+            cur.execute(sql, params)
+            rows = self._attach_sizes(cur, cur.fetchall())
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, (rows[-1]['item_name'], rows[-1]['sku'])
+
+    def _text_match(self, words):
+        if any(len(w) >= 3 for w in words):
+            # FULLTEXT prefix match on every word (ft_min_token_size is 3)
+            return "MATCH(item_name, category, details) AGAINST (%s IN BOOLEAN MODE)", [" ".join(f"+{w}*" for w in words if len(w) >= 3)]
+        # Too short for FULLTEXT: name prefix, served by idx_inventory_name
+        return "item_name LIKE %s", [" ".join(words) + "%"]
+
+    def _upsert_clause(self, key, cols=(), add=()):
+        """Tail for a multi-row INSERT: when `key` already exists, overwrite `cols` and add to `add`."""
+        if self._row_alias is None:
+            with self.session(): pass # first connect records the server version
+        if self._row_alias:
+            # VALUES(col) is deprecated from MySQL 8.0.20 (a warning, so an error under raise_on_warnings)
+            sets = [f"{c} = new.{c}" for c in cols] + [f"{c} = {c} + new.{c}" for c in add]
+            return " AS new ON DUPLICATE KEY UPDATE " + ", ".join(sets)
+        sets = [f"{c} = VALUES({c})" for c in cols] + [f"{c} = {c} + VALUES({c})" for c in add]
+        return " ON DUPLICATE KEY UPDATE " + ", ".join(sets)
+
+    @timed("db.fetch_pricing_rules")
+    def fetch_pricing_rules(self):
+        with self._cursor(dictionary=True) as (conn, cur):
+            cur.execute("SELECT rule_type, match_value, percent FROM pricing_rules WHERE active = 1")
             return cur.fetchall()
-        finally:
-            cur.close(); conn.close()
 
+    @timed("db.fetch_clients")
     def fetch_clients(self):
-        conn = self._connect()
-        cur = conn.cursor(dictionary=True)
+        if self.offline and self._clients is not None:
+            return self._clients
         try:
-            cur.execute("SELECT * FROM clients")
-            return cur.fetchall()
-        finally:
-            cur.close(); conn.close()
+            with self._cursor(dictionary=True) as (conn, cur):
+                cur.execute("SELECT * FROM clients")
+                rows = cur.fetchall()
+        except Error as e:
+            if not self.is_connection_error(e): raise
+            self._went_offline()
+            if self._clients is None: raise
+            return self._clients
+        self._clients = rows
+        return rows
+
+    @timed("db.search_clients")
+    def search_clients(self, query="", limit=20, after=None):
+        """
+        Indexed, keyset-paginated client lookup for the checkout typeahead.
+        A phone number searches contact_no, anything with an "@" searches
+        email_addr, the rest full_name; all are prefix matches served by
+        idx_clients_phone / _email / _name.
+
+        Returns (rows, next_page) like search_inventory. Offline, the
+        recently served clients are searched instead (no further pages).
+        """
+        text = (query or "").strip()
+        digits = re.sub(r"[\s()+-]", "", text)
+        if digits.isdigit(): col, text = "contact_no", digits
+        elif "@" in text: col = "email_addr"
+        else: col = "full_name"
+        if self.offline:
+            return self.clients.search(text, limit), None
+
+        where, params = [], []
+        if text:
+            where.append(f"{col} LIKE %s ESCAPE '!'")
+            params.append(re.sub(r"([!%_])", r"!\1", text) + "%")
+        if after:
+            where.append(f"({col} > %s OR ({col} = %s AND client_id > %s))")
+            params += [after[0], after[0], after[1]]
+        sql = "SELECT * FROM clients"
+        if where: sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {col}, client_id LIMIT %s"
+        params.append(int(limit) + 1)
+
+        try:
+            with self._cursor(dictionary=True) as (conn, cur):
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+        except Error as e:
+            if not self.is_connection_error(e): raise
+            self._went_offline()
+            return self.clients.search(text, limit), None
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, (rows[-1][col], rows[-1]['client_id'])
+
+    @timed("db.get_client")
+    def get_client(self, client_id):
+        """One client by ID, from this terminal's recent clients when possible."""
+        row = self.clients.get(client_id)
+        if row is not None: return row
+        with self._cursor(dictionary=True) as (conn, cur):
+            cur.execute("SELECT * FROM clients WHERE client_id = %s", (client_id,))
+            row = cur.fetchone()
+        if row: self.clients.put([row])
+        return row
 
     # --- INVENTORY OPS ---
-    def add_product(self, name, cat, price, qty, img, desc):
-        conn = self._connect()
-        cur = conn.cursor()
+    @timed("db.add_product")
+    def add_product(self, name, cat, price, qty, img, desc, stock=None):
+        """
+        `stock` is {size: qty}; without it `qty` is split over the category's
+        sizes. Returns the new SKU, or False if the insert failed.
+        """
+        stock = stock if stock is not None else sizes.spread(qty, sizes.sizes_for(cat))
         try:
-            sql = "INSERT INTO inventory (item_name, category, unit_price, qty_in_stock, image_path, details) VALUES (%s, %s, %s, %s, %s, %s)"
-            cur.execute(sql, (name, cat, round(float(price), 2), int(qty), img, desc))
-            conn.commit()
-            return True
+            with self._cursor(dictionary=True) as (conn, cur):
+                sql = "INSERT INTO inventory (item_name, category, unit_price, qty_in_stock, image_path, details) VALUES (%s, %s, %s, %s, %s, %s)"
+                cur.execute(sql, (name, cat, round(float(price), 2), sum(stock.values()), img, desc))
+                sku = cur.lastrowid
+                sizes.write(cur, {sku: stock})
+                row = self._reload_row(cur, sku)
+                version = self._bump_inventory_version(cur, [sku])
+                conn.commit()
+                self.inventory_cache.put(row, version)
+                return sku
         except Error as e:
-            print(e); return False
-        finally:
-            cur.close(); conn.close()
+            metrics.error("add_product", e); return False
 
-    def update_product(self, sku, name, cat, price, qty, img, desc):
-        conn = self._connect()
-        cur = conn.cursor()
+    @timed("db.update_product")
+    def update_product(self, sku, name, cat, price, qty, img, desc, stock=None):
+        """
+        `stock` ({size: qty}) replaces the product's size rows. Without it the
+        rows are kept while `qty` still matches their total and the category's
+        sizes; otherwise `qty` is split over the category's sizes.
+        """
         try:
-            sql = "UPDATE inventory SET item_name=%s, category=%s, unit_price=%s, qty_in_stock=%s, image_path=%s, details=%s WHERE sku=%s"
-            cur.execute(sql, (name, cat, round(float(price), 2), int(qty), img, desc, int(sku)))
-            conn.commit()
-            return True
+            with self._cursor(dictionary=True) as (conn, cur):
+                price = round(float(price), 2)
+                if stock is None:
+                    stock = sizes.resolve(sizes.read(cur, [int(sku)]).get(int(sku)), qty, cat)
+                sql = "UPDATE inventory SET item_name=%s, category=%s, unit_price=%s, qty_in_stock=%s, image_path=%s, details=%s WHERE sku=%s"
+                cur.execute(sql, (name, cat, price, int(qty) if stock is None else sum(stock.values()), img, desc, int(sku)))
+                if stock is not None:
+                    sizes.write(cur, {int(sku): stock})
+                row = self._reload_row(cur, int(sku))
+                version = self._bump_inventory_version(cur, [sku])
+                conn.commit()
+                if row: self.inventory_cache.put(row, version)
+                return True
         except Error as e:
-            print(e); return False
-        finally:
-            cur.close(); conn.close()
+            metrics.error("update_product", e); return False
 
+    @timed("db.remove_item")
     def remove_item(self, sku):
-        conn = self._connect()
-        cur = conn.cursor()
         try:
-            cur.execute("DELETE FROM inventory WHERE sku = %s", (int(sku),))
-            conn.commit()
-            return True
-        except Error: return False
-        finally:
-            cur.close(); conn.close()
+            with self._cursor() as (conn, cur):
+                cur.execute("DELETE FROM inventory_sizes WHERE sku = %s", (int(sku),))
+                cur.execute("DELETE FROM inventory WHERE sku = %s", (int(sku),))
+                version = self._bump_inventory_version(cur, [sku])
+                conn.commit()
+                self.inventory_cache.drop(sku, version)
+                return True
+        except Error as e:
+            metrics.error("remove_item", e); return False
 
     # --- CRM OPS ---
+    @timed("db.register_client")
     def register_client(self, name, phone, email, c_type='Regular'):
-        conn = self._connect()
-        cur = conn.cursor()
-        try:
-            sql = "INSERT INTO clients (full_name, contact_no, email_addr, client_type) VALUES (%s, %s, %s, %s)"
-            cur.execute(sql, (name, phone, email, c_type))
-            conn.commit()
-            return True, cur.lastrowid
-        except Error as e: return False, str(e)
-        finally:
-            cur.close(); conn.close()
+        try:
+            with self._cursor() as (conn, cur):
+                sql = "INSERT INTO clients (full_name, contact_no, email_addr, client_type) VALUES (%s, %s, %s, %s)"
+                cur.execute(sql, (name, phone, email, c_type))
+                conn.commit()
+                self.clients.put([{'client_id': cur.lastrowid, 'full_name': name, 'contact_no': phone,
+                                   'email_addr': email, 'client_type': c_type}])
+                return True, cur.lastrowid
+        except Error as e:
+            metrics.error("register_client", e); return False, str(e)
 
     # --- CHECKOUT OPS ---
-    def process_transaction(self, staff_id, client_id, cart, subtotal, discount, total, pay_method):
-        """
-        Cart Keys are now 'SKU_SIZE' (e.g. '5_M', '12_42')
-        """
-        conn = self._connect()
-        cur = conn.cursor()
-        try:
-            conn.start_transaction()
-            
-            safe_sub = round(float(subtotal), 2)
-            safe_disc = round(float(discount), 2)
-            safe_tot = round(float(total), 2)
-
-            # 1. Log Sale
-            sql_head = "INSERT INTO sales_log (staff_id, client_id, subtotal, discount_amount, grand_total, payment_method) VALUES (%s, %s, %s, %s, %s, %s)"
-            cur.execute(sql_head, (staff_id, client_id, safe_sub, safe_disc, safe_tot, pay_method))
-            sale_id = cur.lastrowid
-
-            # 2. Items
-            for key, qty in cart.items():
-                # Parse "SKU_SIZE" -> SKU, SIZE
-                if "_" in str(key):
-                    sku_str, size_val = str(key).split("_", 1)
-                    sku = int(sku_str)
-                else:
-                    sku = int(key)
-                    size_val = "N/A"
+    @timed("db.process_transaction")
+    def process_transaction(self, staff_id, client_id, cart, pay_method, voucher=None):
+        """
+        `cart` is a cart.Cart (or its (sku, size, qty) payload).
 
-                cur.execute("SELECT unit_price, qty_in_stock FROM inventory WHERE sku = %s", (sku,))
+        Totals are priced here by the PricingEngine against the locked
+        inventory rows and the client's tier, never taken from the UI.
+
+        If the database is unreachable the sale is priced from the cached
+        catalogue and rules and written to the offline journal instead; the
+        returned receipt ID is then a local "L-..." reference.
+        """
+        lines = cart_lines(cart)
+        if not lines:
+            return False, "Cart is empty"
+
+        ref = new_ref()
+        if self.offline:
+            return self._journal_sale(ref, staff_id, client_id, lines, pay_method, voucher)
+        try:
+            self.pricing.rules() # load/refresh outside the transaction so it never needs a second connection
+            with self._cursor() as (conn, cur):
+                try:
+                    return True, self._write_sale(conn, cur, ref, staff_id, client_id, lines, pay_method, voucher)
+                except Exception as e:
+                    if self.is_connection_error(e): raise
+                    conn.rollback()
+                    return False, str(e)
+        except Error as e:
+            if not self.is_connection_error(e): return False, str(e)
+            self._went_offline()
+            return self._journal_sale(ref, staff_id, client_id, lines, pay_method, voucher)
+
+    def _write_sale(self, conn, cur, ref, staff_id, client_id, lines, pay_method, voucher, journaled=None):
+        """
+        Set-based: only the (sku, size) ledger rows being sold are locked and
+        read, in one statement, decremented in one statement and the line
+        items written as one multi-row insert, so checkout is a fixed number
+        of round trips, two terminals cannot oversell the same size, and
+        sales of different sizes of a hot item do not wait on each other.
+
+        `journaled` is the offline journal entry when replaying; its totals,
+        prices and sale time are kept, and a sale already on the server
+        (same client_ref) is acknowledged rather than written twice.
+        """
+        # Aggregate quantities per (sku, size)
+        wanted = {}
+        for sku, size, qty in lines:
+            wanted[(sku, size)] = wanted.get((sku, size), 0) + qty
+        keys = sorted(wanted)
+        skus = sorted({sku for sku, _ in keys})
+        marks = ", ".join(["%s"] * len(skus))
+        pairs = ", ".join(["(%s, %s)"] * len(keys))
+        flat = [v for key in keys for v in key]
+
+        conn.start_transaction()
+        if journaled:
+            cur.execute("SELECT sale_id FROM sales_log WHERE client_ref = %s", (ref,))
+            done = cur.fetchone()
+            if done:
+                conn.rollback()
+                return done[0]
+
+        # 1. Lock + read the size rows (sorted, so terminals lock in the same order).
+        #    The product rows are only read, for price and category.
+        cur.execute(f"SELECT sku, size, qty FROM inventory_sizes WHERE (sku, size) IN ({pairs}) ORDER BY sku, size FOR UPDATE", flat)
+        stock = {(sku, size): qty for sku, size, qty in cur.fetchall()}
+        cur.execute(f"SELECT sku, unit_price, category FROM inventory WHERE sku IN ({marks})", skus)
+        snapshot = {sku: {'unit_price': price, 'category': cat} for sku, price, cat in cur.fetchall()}
+
+        for sku in skus:
+            if sku not in snapshot: raise StockConflict(f"Product not found (SKU {sku})")
+        for sku, size in keys:
+            if stock.get((sku, size), 0) < wanted[(sku, size)]: raise StockConflict(f"Insufficient stock for SKU {sku} size {size}")
+
+        # 2. Deduct Stock (per size) - one conditional update for all rows
+        cases = " ".join(["WHEN sku = %s AND size = %s THEN %s"] * len(keys))
+        arms = [v for key in keys for v in (*key, wanted[key])]
+        cur.execute(
+            f"UPDATE inventory_sizes SET qty = qty - CASE {cases} END "
+            f"WHERE (sku, size) IN ({pairs}) AND qty >= CASE {cases} END", arms + flat + arms)
+        if cur.rowcount != len(keys): raise StockConflict("Stock changed during checkout, please retry")
+
+        # 3. Price server-side (a replayed sale keeps what the customer was charged)
+        if journaled:
+            quote = Quote(*quote_from_entry(journaled))
+            prices = {int(sku): p for sku, p in journaled['prices'].items()}
+        else:
+            client_type = None
+            if client_id is not None:
+                cur.execute("SELECT client_type FROM clients WHERE client_id = %s", (client_id,))
                 res = cur.fetchone()
-                if not res: raise Exception("Product not found")
-                price, stock = res
-                
-                if stock < qty: raise Exception(f"Insufficient stock for SKU {sku}")
-
-                # Deduct Stock (Overall)
-                cur.execute("UPDATE inventory SET qty_in_stock = qty_in_stock - %s WHERE sku = %s", (qty, sku))
-                
-                # Insert Line Item with Size
-                sql_line = "INSERT INTO sales_items (sale_id, sku, qty, item_size, sold_at_price) VALUES (%s, %s, %s, %s, %s)"
-                cur.execute(sql_line, (sale_id, sku, qty, size_val, price))
-
-            conn.commit()
-            return True, sale_id
-        except Exception as e:
-            conn.rollback()
-            return False, str(e)
-        finally:
-            cur.close(); conn.close()
+                client_type = res[0] if res else None
+            quote = self.pricing.quote_one(lines, client_type, voucher, snapshot)
+            prices = {}
+
+        # 4. Log Sale
+        if journaled:
+            sql_head = "INSERT INTO sales_log (staff_id, client_id, subtotal, discount_amount, grand_total, payment_method, client_ref, sale_date) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+            cur.execute(sql_head, (staff_id, client_id, quote.subtotal, quote.discount, quote.total, pay_method, ref, journaled['ts']))
+        else:
+            sql_head = "INSERT INTO sales_log (staff_id, client_id, subtotal, discount_amount, grand_total, payment_method, client_ref) VALUES (%s, %s, %s, %s, %s, %s, %s)"
+            cur.execute(sql_head, (staff_id, client_id, quote.subtotal, quote.discount, quote.total, pay_method, ref))
+        sale_id = cur.lastrowid
+
+        # 5. Line Items with Size - executemany is sent as a single multi-row INSERT
+        sql_line = "INSERT INTO sales_items (sale_id, sku, qty, item_size, sold_at_price) VALUES (%s, %s, %s, %s, %s)"
+        prices = {sku: prices.get(sku, snapshot[sku]['unit_price']) for sku in skus}
+        cur.executemany(sql_line, [(sale_id, sku, qty, size_val, prices[sku]) for sku, size_val, qty in lines])
+
+        # 6. Daily reporting aggregates, in the same transaction
+        record_sale(self, cur, journaled['ts'][:10] if journaled else None, staff_id, pay_method, quote, lines, snapshot, prices)
+
+        version = self._bump_inventory_version(cur, skus)
+        conn.commit()
+        self.inventory_cache.adjust_stock({key: -q for key, q in wanted.items()}, version)
+        return sale_id
+
+    def _journal_sale(self, ref, staff_id, client_id, lines, pay_method, voucher):
+        """Offline checkout: check stock and price against the cached catalogue, then journal the sale."""
+        cache = self.inventory_cache
+        if not cache.loaded:
+            return False, "Database unavailable and no cached catalogue to sell from"
+        inventory = {i['sku']: i for i in cache.rows()}
+
+        wanted = {}
+        for sku, size, qty in lines:
+            wanted[(sku, size)] = wanted.get((sku, size), 0) + qty
+        for (sku, size), qty in wanted.items():
+            if sku not in inventory: return False, f"Product not found (SKU {sku})"
+            if inventory[sku]['sizes'].get(size, 0) < qty: return False, f"Insufficient stock for SKU {sku} size {size}"
 
+        try:
+            quote = self.pricing.quote_one(lines, self.clients.tier(client_id), voucher, inventory)
+        except Error:
+            return False, "Database unavailable and pricing rules not loaded"
+        prices = {sku: inventory[sku]['unit_price'] for sku, _ in wanted}
+        try:
+            self.journal.record_sale(ref, staff_id, client_id, lines, pay_method, voucher, quote, prices)
+        except OSError as e:
+            return False, f"Could not write offline journal: {e}"
+        cache.adjust_stock({key: -q for key, q in wanted.items()}, None)
+        metrics.incr("checkout.journaled")
+        return True, ref
+
+    @timed("db.replay_sales")
+    def replay_sales(self, entries):
+        """
+        Push journaled sales to the database, one transaction each over a
+        single connection. Returns [(ref, ok, sale_id or conflict reason)].
+        Connection errors propagate so the caller can retry the rest later.
+        """
+        results = []
+        with self._cursor() as (conn, cur):
+            for e in entries:
+                try:
+                    sale_id = self._write_sale(conn, cur, e['ref'], e['staff_id'], e['client_id'],
+                                               [tuple(l) for l in e['lines']], e['pay_method'], e['voucher'], journaled=e)
+                    results.append((e['ref'], True, sale_id))
+                except Exception as ex:
+                    if self.is_connection_error(ex): raise
+                    conn.rollback()
+                    results.append((e['ref'], False, str(ex)))
+        self.offline_until = 0.0
+        return results
+
+    @timed("db.get_order_details")
     def get_order_details(self, sale_id):
-        conn = self._connect()
-        cur = conn.cursor(dictionary=True)
-        try:
-            cur.execute("""
-                SELECT s.*, u.display_name as staff_name, c.full_name as client_name 
-                FROM sales_log s 
-                LEFT JOIN staff_users u ON s.staff_id = u.uid
-                LEFT JOIN clients c ON s.client_id = c.client_id
-                WHERE s.sale_id = %s
-            """, (sale_id,))
-            header = cur.fetchone()
-            
-            cur.execute("""
-                SELECT i.*, p.item_name 
-                FROM sales_items i 
-                JOIN inventory p ON i.sku = p.sku 
-                WHERE i.sale_id = %s
-            """, (sale_id,))
-            items = cur.fetchall()
-            
-            return header, items
-        finally:
-            cur.close(); conn.close()
\ No newline at end of file
+        # Local receipt IDs: served from the journal until synced, then looked up by client_ref
+        key = "s.sale_id"
+        if is_local_ref(sale_id):
+            entry = self.journal.get(sale_id)
+            if entry is not None and entry['status'] != 'synced':
+                return self._journaled_details(entry)
+            key = "s.client_ref"
+
+        with self._cursor(dictionary=True) as (conn, cur):
+            orders = self._order_batch(cur, f"{key} = %s", (sale_id,))
+        return orders[0] if orders else (None, [])
+
+    def get_orders_details(self, sale_ids=None, start=None, end=None, chunk=500):
+        """
+        Stream (header, items) for many receipts: either the given sale_ids
+        (in that order) or every sale dated start..end (inclusive dates,
+        oldest first). Each chunk of `chunk` orders costs two queries, and the
+        pooled connection is released between chunks.
+        """
+        if sale_ids is not None:
+            # Server IDs may arrive as text (a CSV, a search box); match them as ints (ValueError if not numeric)
+            ids = [r if is_local_ref(r) else int(r) for r in sale_ids]
+            for i in range(0, len(ids), chunk):
+                part = ids[i:i + chunk]
+                local = [r for r in part if is_local_ref(r)]
+                remote = [r for r in part if not is_local_ref(r)]
+                found = {}
+                if remote:
+                    with self._cursor(dictionary=True) as (conn, cur):
+                        marks = ", ".join(["%s"] * len(remote))
+                        for head, items in self._order_batch(cur, f"s.sale_id IN ({marks})", remote):
+                            found[head['sale_id']] = (head, items)
+                for ref in local:
+                    found[ref] = self.get_order_details(ref)
+                for ref in part:
+                    if ref in found and found[ref][0] is not None: yield found[ref]
+            return
+
+        # Keyset over (sale_date, sale_id), served by idx_sales_date
+        lo, hi = f"{start} 00:00:00", f"{end} 23:59:59"
+        after = None
+        while True:
+            with self._cursor(dictionary=True) as (conn, cur):
+                if after is None:
+                    where, params = "s.sale_date BETWEEN %s AND %s", (lo, hi)
+                else:
+                    where = "s.sale_date <= %s AND (s.sale_date > %s OR (s.sale_date = %s AND s.sale_id > %s))"
+                    params = (hi, after[0], after[0], after[1])
+                orders = self._order_batch(cur, where, params, order="s.sale_date, s.sale_id", limit=chunk)
+            yield from orders
+            if len(orders) < chunk: return
+            last = orders[-1][0]
+            after = (last['sale_date'], last['sale_id'])
+
+    def _order_batch(self, cur, where, params, order="s.sale_id", limit=None):
+        """Headers matching `where`, then all their lines in one IN query: [(header, items)]."""
+        cur.execute(f"""
+            SELECT s.*, u.display_name as staff_name, c.full_name as client_name
+            FROM sales_log s
+            LEFT JOIN staff_users u ON s.staff_id = u.uid
+            LEFT JOIN clients c ON s.client_id = c.client_id
+            WHERE {where}
+            ORDER BY {order}{f" LIMIT {int(limit)}" if limit else ""}
+        """, params)
+        headers = cur.fetchall()
+        if not headers: return []
+
+        lines = {h['sale_id']: [] for h in headers}
+        marks = ", ".join(["%s"] * len(lines))
+        cur.execute(f"""
+            SELECT i.*, p.item_name
+            FROM sales_items i
+            JOIN inventory p ON i.sku = p.sku
+            WHERE i.sale_id IN ({marks})
+            ORDER BY i.sale_id, i.line_id
+        """, list(lines))
+        for row in cur.fetchall():
+            lines[row['sale_id']].append(row)
+        return [(h, lines[h['sale_id']]) for h in headers]
+
+    def _journaled_details(self, entry):
+        """Receipt header/items for a sale that only exists in the offline journal."""
+        header = {
+            'sale_id': entry['ref'], 'sale_date': entry['ts'], 'payment_method': entry['pay_method'],
+            'staff_name': self._staff_names.get(entry['staff_id'], f"#{entry['staff_id']}"),
+            'client_name': self.clients.name(entry['client_id']),
+            'subtotal': entry['subtotal'], 'discount_amount': entry['discount'], 'grand_total': entry['total'],
+        }
+        items = []
+        for sku, size, qty in entry['lines']:
+            row = self.inventory_cache.get(sku) or {}
+            items.append({'sku': sku, 'item_name': row.get('item_name', f"SKU {sku}"), 'item_size': size,
+                          'qty': qty, 'sold_at_price': entry['prices'].get(str(sku))})
+        return header, items
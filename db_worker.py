@@ -0,0 +1,118 @@
+import itertools
+import queue
+import threading
+import time
+
+from instrumentation import metrics
+
+
+class DBWorker:
+    """
+    Runs SmartFitDB calls on background threads so the Tk mainloop never
+    waits on MySQL. Results are handed back to the Tk thread by polling a
+    queue with after().
+
+    Requests submitted with the same `key` supersede each other: once a newer
+    request for a key exists, older ones are skipped if not started yet and
+    their results are dropped if they were (e.g. an outdated search).
+    """
+
+    def __init__(self, root, workers=2, poll_ms=20):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._latest = {} # key -> newest token
+        self._tokens = itertools.count(1)
+        self._pending = 0
+        self._polling = False
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'completed': 0, 'cancelled': 0, 'failed': 0,
+                      'db_time': 0.0, 'ui_time': 0.0, 'max_ui_ms': 0.0}
+        metrics.add_source("db_worker", lambda: dict(self.stats))
+        self._threads = [threading.Thread(target=self._run, name=f"db-worker-{i}", daemon=True) for i in range(workers)]
+        for t in self._threads: t.start()
+
+    def submit(self, fn, *args, on_done=None, on_error=None, key=None, **kwargs):
+        """Queue fn(*args, **kwargs); on_done(result) / on_error(exc) run later on the Tk thread."""
+        token = next(self._tokens)
+        if key is not None:
+            self._latest[key] = token
+        self._pending += 1
+        self.stats['submitted'] += 1
+        self._requests.put((token, key, fn, args, kwargs, on_done, on_error))
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return token
+
+    def cancel(self, key):
+        """Drop whatever is queued or in flight for `key`."""
+        self._latest[key] = next(self._tokens)
+
+    def _stale(self, token, key):
+        return key is not None and self._latest.get(key) != token
+
+    def _run(self):
+        while True:
+            req = self._requests.get()
+            if req is None: return
+            token, key, fn, args, kwargs, on_done, on_error = req
+            if self._stale(token, key):
+                self._results.put((token, key, None, None, None, None))
+                continue
+            start = time.perf_counter()
+            try:
+                result, error = fn(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, e
+            with self._lock:
+                self.stats['db_time'] += time.perf_counter() - start
+            self._results.put((token, key, result, error, on_done, on_error))
+
+    def _poll(self):
+        while True:
+            try:
+                token, key, result, error, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if self._stale(token, key):
+                self.stats['cancelled'] += 1
+                continue
+
+            start = time.perf_counter()
+            try:
+                if error is None:
+                    self.stats['completed'] += 1
+                    if on_done: on_done(result)
+                else:
+                    self.stats['failed'] += 1
+                    if on_error: on_error(error)
+                    else: metrics.error("worker", error)
+            finally:
+                spent = time.perf_counter() - start
+                metrics.observe("ui.worker_callback", spent)
+                self.stats['ui_time'] += spent
+                self.stats['max_ui_ms'] = max(self.stats['max_ui_ms'], spent * 1000)
+
+        if self._pending > 0:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def report(self):
+        """
+        UI-thread blocking for the work routed through the worker. Only
+        ui_time (result handling) is measured; run inline, the same calls
+        would also have blocked for roughly db_time, which is reported as an
+        estimate, not a measured baseline.
+        """
+        s = self.stats
+        return (f"DB calls: {s['completed']} ok, {s['failed']} failed, {s['cancelled']} cancelled | "
+                f"UI blocked: {s['ui_time'] * 1000:.0f} ms measured (worst callback {s['max_ui_ms']:.1f} ms), "
+                f"~{(s['db_time'] + s['ui_time']) * 1000:.0f} ms estimated if the DB calls ran inline")
+
+    def shutdown(self):
+        for _ in self._threads:
+            self._requests.put(None)
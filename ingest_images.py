@@ -0,0 +1,230 @@
+"""
+Bulk product-photo ingestion.
+
+Walks a folder tree of product photos and turns it into inventory rows:
+
+  1. scan      every image file under the folder (sorted, so runs are repeatable)
+  2. inspect   in a process pool: content hash, PIL verify, and a full
+               decode into the normalized card thumbnail (thumbnails.make_thumbnail,
+               so the store grid never decodes the full-size photo)
+  3. dedup     files with identical content are ingested once (the copy the
+               sidecar names, else the first path)
+  4. import    one CSV row per kept photo goes through bulk_io's batched,
+               validated upsert (sizes ledger and change feed included)
+
+Price, category, stock and details come from a sidecar CSV (default:
+products.csv in the folder) keyed by `file`, the photo's path relative to
+the folder; the other columns are bulk_io's (item_name, category,
+unit_price, qty_in_stock, sizes, details, sku). Without a sidecar row the
+name comes from the file name, the category from a parent folder named
+Uppers/Lowers/Shoes, and the price from --default-price; photos that still
+lack a price are reported, never priced at random. A photo whose path is
+already some product's image_path updates that product; whatever the
+sidecar leaves out (including its per-size stock) is kept as it is.
+
+    python ingest_images.py photos/spring_2027 [--sidecar spring.csv] [--workers 8]
+"""
+import csv
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+import sizes
+from bulk_io import CATEGORIES, CSV_COLUMNS, import_inventory_csv
+from thumbnails import make_thumbnail
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif")
+IGNORE = {"logo.png", "overlay.png", "visa.png"}
+SIDECAR = "products.csv"
+CHUNK = 8 # photos per task sent to a worker process
+MAX_ERRORS = 200
+
+
+def scan(folder):
+    """Every image file under `folder` (hidden folders skipped), sorted by path."""
+    out = []
+    stack = [os.path.abspath(folder)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            entries = list(it)
+        for e in entries:
+            if e.is_dir(follow_symlinks=False):
+                if not e.name.startswith("."): stack.append(e.path)
+            elif e.name.lower().endswith(IMAGE_EXTS) and e.name.lower() not in IGNORE:
+                out.append(e.path)
+    return sorted(out, key=str.lower)
+
+
+def inspect(path):
+    """
+    Runs in a worker process. Returns {'path', 'hash', 'size'} for a usable
+    photo (and leaves its thumbnail in the disk cache), or {'path', 'error'}.
+    """
+    try:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        with Image.open(path) as img:
+            size = img.size
+            img.verify() # structure only; a truncated JPEG can still pass this
+        # Building the thumbnail decodes the whole file (at reduced scale for JPEG),
+        # which is what catches truncated or corrupt image data
+        make_thumbnail(path)
+        return {'path': path, 'hash': digest.hexdigest(), 'size': size}
+    except Exception as e:
+        return {'path': path, 'error': f"{type(e).__name__}: {e}"}
+
+
+def read_sidecar(path):
+    """{relative file path (forward slashes, lower-case): CSV dict}."""
+    if not path or not os.path.exists(path): return {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return {(rec.get('file') or "").strip().replace("\\", "/").lower(): rec for rec in csv.DictReader(f)}
+
+
+def sidecar_row(folder, path, sidecar):
+    rel = os.path.relpath(path, folder).replace("\\", "/").lower()
+    return sidecar.get(rel) or sidecar.get(os.path.basename(rel))
+
+
+def product_row(folder, path, sidecar, default_price, current=None):
+    """CSV dict for bulk_io, or a str explaining why the photo cannot be imported."""
+    rel = os.path.relpath(path, folder).replace("\\", "/")
+    given = sidecar_row(folder, path, sidecar) or {}
+    rec = dict(current or {})
+    if (given.get('qty_in_stock') or "").strip() and not (given.get('sizes') or "").strip():
+        rec.pop('sizes', None) # a new total replaces the current size split
+    rec.update((k, v) for k, v in given.items() if (v or "").strip())
+    rec['image_path'] = path
+    if not (rec.get('item_name') or "").strip():
+        rec['item_name'] = os.path.splitext(os.path.basename(path))[0].replace("_", " ").replace("-", " ").title()
+    if not (rec.get('category') or "").strip():
+        parents = [p for p in rel.split("/")[:-1] if p.title() in CATEGORIES]
+        if parents: rec['category'] = parents[-1].title()
+    if not (rec.get('unit_price') or "").strip():
+        if default_price is None: return "no unit_price in the sidecar and no --default-price"
+        rec['unit_price'] = str(default_price)
+    return rec
+
+
+def existing(db, paths, batch=500):
+    """{image_path: CSV dict of the current product} for products already using one of `paths`."""
+    out = {}
+    with db._cursor(dictionary=True) as (conn, cur):
+        for i in range(0, len(paths), batch):
+            part = paths[i:i + batch]
+            cur.execute("SELECT sku, item_name, category, unit_price, details, image_path FROM inventory "
+                        f"WHERE image_path IN ({', '.join(['%s'] * len(part))})", part)
+            rows = cur.fetchall()
+            ledger = sizes.read(cur, [r['sku'] for r in rows])
+            for r in rows:
+                rec = {k: "" if v is None else str(v) for k, v in r.items()}
+                if r['sku'] in ledger: rec['sizes'] = sizes.format_sizes(ledger[r['sku']])
+                out[r['image_path']] = rec
+    return out
+
+
+def ingest_folder(db, folder, sidecar=None, default_price=None, workers=None, progress=None):
+    """
+    Ingest every photo under `folder`. progress(report) is called as photos
+    are inspected and after each import commit; returns the final report:
+    {'images', 'bad', 'duplicates', 'skipped', 'upserted', 'inserted',
+     'invalid', 'errors': [(path, msg)], 'seconds', 'fraction'}
+    """
+    began = time.perf_counter()
+    folder = os.path.abspath(folder)
+    report = {'images': 0, 'bad': 0, 'duplicates': 0, 'skipped': 0, 'upserted': 0, 'inserted': 0,
+              'invalid': 0, 'errors': [], 'seconds': 0.0, 'fraction': 0.0, 'status': "Scanning..."}
+
+    def note(path, msg):
+        if len(report['errors']) < MAX_ERRORS: report['errors'].append((path, msg))
+
+    def tick(fraction, status):
+        report['fraction'], report['status'] = fraction, status
+        report['seconds'] = time.perf_counter() - began
+        if progress: progress(dict(report, errors=list(report['errors'])))
+
+    paths = scan(folder)
+    sidecar = read_sidecar(sidecar or os.path.join(folder, SIDECAR))
+    report['images'] = len(paths)
+    tick(0.0, f"Checking {len(paths):,} photos...")
+
+    # --- INSPECT (process pool; spawn, as the caller may be a threaded Tk app) ---
+    seen = {} # content hash -> path kept
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for n, res in enumerate(pool.map(inspect, paths, chunksize=CHUNK), 1):
+            if 'error' in res:
+                report['bad'] += 1
+                note(res['path'], res['error'])
+            elif res['hash'] in seen:
+                report['duplicates'] += 1
+                first, dup = seen[res['hash']], res['path']
+                if sidecar_row(folder, dup, sidecar) and not sidecar_row(folder, first, sidecar):
+                    seen[res['hash']], first, dup = dup, dup, first
+                note(dup, f"same picture as {first}")
+            else:
+                seen[res['hash']] = res['path']
+            if n % 50 == 0 or n == len(paths):
+                tick(0.8 * n / max(1, len(paths)), f"Checked {n:,} of {len(paths):,} photos")
+
+    # --- IMPORT (bulk_io: validated, batched upserts) ---
+    kept = sorted(seen.values(), key=str.lower)
+    current = existing(db, kept)
+    rows, sources = [], []
+    for path in kept:
+        rec = product_row(folder, path, sidecar, default_price, current.get(path))
+        if isinstance(rec, str):
+            report['skipped'] += 1
+            note(path, rec)
+            continue
+        rows.append(rec)
+        sources.append(path)
+
+    if rows:
+        fd, tmp = tempfile.mkstemp(suffix=".csv", prefix="ingest-")
+        try:
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+                out = csv.DictWriter(f, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+                out.writeheader()
+                out.writerows(rows)
+
+            def imported(p):
+                report.update(upserted=p['upserted'], inserted=p['inserted'], invalid=p['invalid'])
+                tick(0.8 + 0.2 * p['fraction'], f"Imported {p['upserted'] + p['inserted']:,} products")
+
+            result = import_inventory_csv(db, tmp, progress=imported)
+        finally:
+            os.remove(tmp)
+        report.update(upserted=result['upserted'], inserted=result['inserted'], invalid=result['invalid'])
+        for line, msg in result['errors']:
+            note(sources[line - 2] if 2 <= line < len(sources) + 2 else f"row {line}", msg) # line 1 is the header
+
+    tick(1.0, "Done")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    from db_manager import open_db
+
+    ap = argparse.ArgumentParser(description="Ingest a folder of SmartFit product photos")
+    ap.add_argument("folder", help="folder of product photos (searched recursively)")
+    ap.add_argument("--sidecar", help=f"CSV with file,item_name,category,unit_price,... (default: FOLDER/{SIDECAR})")
+    ap.add_argument("--default-price", help="price for photos without one in the sidecar")
+    ap.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = ap.parse_args()
+    db = open_db()
+    rep = ingest_folder(db, args.folder, args.sidecar, args.default_price, args.workers,
+                        progress=lambda p: print(f"\r {p['status']:<40}", end=""))
+    print(f"\n[OK] {rep['images']:,} photos: {rep['inserted']:,} new, {rep['upserted']:,} updated, "
+          f"{rep['duplicates']:,} duplicates, {rep['bad']:,} unreadable, {rep['skipped'] + rep['invalid']:,} not imported "
+          f"({rep['seconds']:.1f}s)")
+    for path, msg in rep['errors'][:20]:
+        print(f" - {path}: {msg}")
+    db.close()
@@ -1,5 +1,3 @@
-import mysql.connector
-
 # Database Config
 DB_SETTINGS = {
     'user': 'root',
@@ -8,6 +6,8 @@ DB_SETTINGS = {
 }
 DB_NAME = 'smartfit_apparel'
 
+# Baseline schema (migration 1). Later changes - new columns, indexes - are
+# forward migrations in migrations.py; don't edit these for an upgrade.
 DDL_STATEMENTS = {}
 
 # Users
@@ -32,6 +32,33 @@ DDL_STATEMENTS['inventory'] = (
     "  details TEXT"
     ") ENGINE=InnoDB")
 
+# Inventory change counter - bumped by every SmartFitDB write so terminals can
+# cheaply check whether their cached catalogue is stale
+DDL_STATEMENTS['inventory_version'] = (
+    "CREATE TABLE IF NOT EXISTS inventory_version ("
+    "  id TINYINT PRIMARY KEY,"
+    "  version BIGINT NOT NULL DEFAULT 0"
+    ") ENGINE=InnoDB")
+
+# Pricing Rules - tier discounts, voucher codes and category promos (see pricing.py)
+DDL_STATEMENTS['pricing_rules'] = (
+    "CREATE TABLE IF NOT EXISTS pricing_rules ("
+    "  rule_id INT AUTO_INCREMENT PRIMARY KEY,"
+    "  rule_type VARCHAR(20) NOT NULL,"
+    "  match_value VARCHAR(50) NOT NULL,"
+    "  percent DECIMAL(5, 2) NOT NULL,"
+    "  active TINYINT(1) NOT NULL DEFAULT 1,"
+    "  UNIQUE KEY uq_pricing_rule (rule_type, match_value)"
+    ") ENGINE=InnoDB")
+
+# Default tier discounts and vouchers (previously hard-coded in CheckoutPage); inserted by migration 10
+DEFAULT_PRICING_RULES = [
+    ('tier', 'Gold', 15.00),
+    ('tier', 'Silver', 10.00),
+    ('tier', 'Bronze', 5.00),
+    ('voucher', 'Jhapa5', 5.00)
+]
+
 # Clients
 DDL_STATEMENTS['clients'] = (
     "CREATE TABLE IF NOT EXISTS clients ("
@@ -70,7 +97,24 @@ DDL_STATEMENTS['sales_items'] = (
     "  FOREIGN KEY (sku) REFERENCES inventory(sku)"
     ") ENGINE=InnoDB")
 
-def init_system():
+TABLES = ['sales_daily_lines', 'sales_daily_orders', 'sales_items', 'sales_log', 'pricing_rules', 'inventory_changes', 'inventory_version', 'inventory_sizes', 'inventory', 'clients', 'staff_users', 'schema_version']
+
+def init_system(reset=False):
+    """
+    Create or upgrade the schema by running pending migrations, then seed the
+    demo data if the database is empty. Existing data is never touched
+    unless reset=True, which drops every table first (dev boxes only).
+    """
+    from db_manager import load_db_config
+    cfg = load_db_config()
+    if cfg['backend'] == 'sqlite':
+        from sqlite_backend import init_sqlite
+        init_sqlite(cfg['sqlite_path'], reset=reset)
+        print(f"[OK] SQLite database '{cfg['sqlite_path']}' is up to date.")
+        return
+
+    import mysql.connector
+    from migrations import migrate
     conn = mysql.connector.connect(**DB_SETTINGS)
     cur = conn.cursor()
     try:
@@ -83,21 +127,27 @@ def init_system():
 
     conn = mysql.connector.connect(database=DB_NAME, **DB_SETTINGS)
     cur = conn.cursor()
-    
-    # Drop to reset schema
-    tables_to_drop = ['sales_items', 'sales_log', 'inventory', 'clients', 'staff_users']
-    for t in tables_to_drop:
-        try:
-            cur.execute(f"DROP TABLE IF EXISTS {t}")
-        except: pass
-
-    for table_key, sql in DDL_STATEMENTS.items():
-        try:
-            cur.execute(sql)
-            print(f" - Created new {table_key}")
-        except Exception as e:
-            print(f" - Error making {table_key}: {e}")
+    try:
+        if reset:
+            cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+            for t in TABLES:
+                cur.execute(f"DROP TABLE IF EXISTS {t}")
+            cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+            print(" - Dropped all tables")
+
+        migrate(conn, "mysql")
+        seed_if_empty(cur)
+        conn.commit()
+    finally:
+        cur.close(); conn.close()
+
+def seed_if_empty(cur):
+    cur.execute("SELECT COUNT(*) FROM staff_users")
+    if cur.fetchone()[0] == 0:
+        seed_data(cur)
 
+def seed_data(cur):
+    """Insert the demo staff, stock and clients (shared by the SQLite backend)."""
     # Seed Staff
     team = [
         ('nitesh', 'admin789', 'Manager', 'Nitesh (Lead)'),
@@ -114,6 +164,8 @@ def init_system():
         ('Floral Dress', 'Uppers', 39.99, 20, '', 'Red Print')
     ]
     cur.executemany("INSERT INTO inventory (item_name, category, unit_price, qty_in_stock, image_path, details) VALUES (%s, %s, %s, %s, %s, %s)", clothes)
+    from sizes import backfill
+    backfill(cur) # spread each total over the category's sizes
     print(" + Stock added.")
     
     # Seed Clients
@@ -123,9 +175,24 @@ def init_system():
         ('Mike Ross', '027555123', 'mike@test.com', 'Silver')
     ]
     cur.executemany("INSERT INTO clients (full_name, contact_no, email_addr, client_type) VALUES (%s, %s, %s, %s)", clients)
+    # Pricing rules are not seeded here: migration 10 inserts DEFAULT_PRICING_RULES
 
-    conn.commit()
-    cur.close(); conn.close()
+def show_status():
+    from db_manager import open_db
+    from migrations import status
+    db = open_db()
+    with db.session() as conn:
+        for version, name, done in status(conn, db.DIALECT):
+            print(f" {'[x]' if done else '[ ]'} {version:>3}  {name}")
+    db.close()
 
 if __name__ == "__main__":
-    init_system()
\ No newline at end of file
+    import argparse
+    ap = argparse.ArgumentParser(description="Create or upgrade the SmartFit database")
+    ap.add_argument("--reset", action="store_true", help="drop all tables first (destroys data)")
+    ap.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    args = ap.parse_args()
+    if args.status:
+        show_status()
+    else:
+        init_system(reset=args.reset)
\ No newline at end of file
@@ -0,0 +1,268 @@
+"""
+Timings and counters.
+
+Everything funnels into the module-level `metrics` registry:
+
+  db.<method>        SmartFitDB public calls (@timed)
+  sql:<statement>    every cursor execute/executemany (TimedCursor)
+  ui.<page>.<what>   Tk page refreshes and renders
+  startup.<mark>     seconds from launch to each cold-start milestone
+  counters           connections opened, connect failures, errors by site
+
+Each timer keeps a rolling window of its most recent samples for
+p50/p95/p99 plus lifetime count/total/max. Statements slower than
+`slow_ms` go to the slow-query log (statement text only, never
+parameters). Cost per sample is two perf_counter() calls and a deque
+append, so it stays on in production.
+
+Settings come from smartfit.ini:
+
+    [metrics]
+    slow_query_ms = 200
+    dump_path = smartfit_metrics.json
+    dump_interval = 60          ; seconds, 0 disables the periodic dump
+    startup_log = startup_times.jsonl  ; one line of milestones per launch
+"""
+import configparser
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger("smartfit")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(BASE_DIR, "smartfit.ini")
+WINDOW = 2048 # samples kept per timer for percentiles
+
+
+def load_metrics_config(path=CONFIG_FILE):
+    parser = configparser.ConfigParser()
+    parser.read(path)
+    section = parser['metrics'] if parser.has_section('metrics') else {}
+    return {
+        'slow_query_ms': float(section.get('slow_query_ms', 200)),
+        'dump_path': os.path.join(BASE_DIR, section.get('dump_path', 'smartfit_metrics.json')),
+        'slow_log_path': os.path.join(BASE_DIR, section.get('slow_log_path', 'slow_queries.log')),
+        'dump_interval': float(section.get('dump_interval', 60)),
+        'startup_log': os.path.join(BASE_DIR, section.get('startup_log', 'startup_times.jsonl')),
+    }
+
+
+class Histogram:
+    """Rolling latency window (seconds) with lifetime totals."""
+    __slots__ = ("samples", "count", "total", "max")
+
+    def __init__(self, window=WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max: self.max = seconds
+
+    def summary(self):
+        ms = sorted(s * 1000 for s in self.samples)
+        if not ms:
+            return {'count': 0}
+        pick = lambda q: round(ms[min(len(ms) - 1, int(q * len(ms)))], 2)
+        return {'count': self.count, 'mean_ms': round(self.total * 1000 / self.count, 2),
+                'p50_ms': pick(0.50), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99), 'max_ms': round(self.max * 1000, 2)}
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql, width=160):
+    """One key per statement shape: collapse whitespace, variable-length IN/VALUES lists and CASE arms."""
+    sql = " ".join(sql.split())
+    sql = re.sub(r"(%s,\s*)+%s", "%s, ...", sql)
+    sql = re.sub(r"(\(%s, \.\.\.\),\s*)+\(%s, \.\.\.\)", "(%s, ...), ...", sql)
+    sql = re.sub(r"(WHEN (?:(?!THEN).)*THEN [^%]*%s\s*)+", "WHEN ... ", sql)
+    return sql[:width]
+
+
+class Metrics:
+    def __init__(self, slow_ms=200.0, slow_log_path=None):
+        self.slow_ms = slow_ms
+        self.slow_log_path = slow_log_path
+        self.started = time.time()
+        self._timers = {}
+        self._counters = {}
+        self._sources = {} # name -> callable returning a dict (e.g. pool stats)
+        self.slow = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._dumper = None
+
+    # --- RECORDING ---
+    def observe(self, name, seconds):
+        with self._lock:
+            h = self._timers.get(name)
+            if h is None:
+                h = self._timers[name] = Histogram()
+            h.add(seconds)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def error(self, where, exc):
+        """Count and log a swallowed error (replaces bare print(e))."""
+        self.incr(f"errors.{where}")
+        log.warning("%s failed: %s", where, exc)
+
+    def sql(self, statement, seconds):
+        key = normalize_sql(statement)
+        self.observe("sql:" + key, seconds)
+        if seconds * 1000 >= self.slow_ms:
+            entry = (time.strftime("%Y-%m-%d %H:%M:%S"), round(seconds * 1000, 1), key)
+            self.slow.append(entry)
+            self.incr("sql.slow")
+            if self.slow_log_path:
+                try:
+                    with open(self.slow_log_path, "a", encoding="utf-8") as f:
+                        f.write("%s  %8.1f ms  %s\n" % entry)
+                except OSError:
+                    pass
+
+    def timer(self, name):
+        return _Timer(self, name)
+
+    def add_source(self, name, fn):
+        self._sources[name] = fn
+
+    # --- READING ---
+    def snapshot(self):
+        with self._lock:
+            timers = {name: h.summary() for name, h in self._timers.items()}
+            counters = dict(self._counters)
+        sources = {}
+        for name, fn in list(self._sources.items()):
+            try: sources[name] = fn()
+            except Exception as e: sources[name] = {'error': str(e)}
+        return {'uptime_s': round(time.time() - self.started), 'timers': timers, 'counters': counters,
+                'sources': sources, 'slow_queries': list(self.slow)}
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+            self.slow.clear()
+            self.started = time.time()
+
+    def dump(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2, default=str)
+        os.replace(tmp, path)
+
+    def start_dump(self, path, interval):
+        """Rewrite `path` with a snapshot every `interval` seconds on a daemon thread."""
+        if interval <= 0 or self._dumper is not None: return
+        def loop():
+            while True:
+                time.sleep(interval)
+                try: self.dump(path)
+                except OSError as e: log.warning("metrics dump failed: %s", e)
+        self._dumper = threading.Thread(target=loop, name="metrics-dump", daemon=True)
+        self._dumper.start()
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics, self.name = metrics, name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+
+
+class TimedCursor:
+    """Cursor proxy that times every statement; everything else passes through."""
+
+    def __init__(self, cur, metrics):
+        self._cur = cur
+        self._metrics = metrics
+
+    def execute(self, sql, params=None):
+        start = time.perf_counter()
+        try:
+            return self._cur.execute(sql) if params is None else self._cur.execute(sql, params)
+        finally:
+            self._metrics.sql(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq):
+        start = time.perf_counter()
+        try:
+            return self._cur.executemany(sql, seq)
+        finally:
+            self._metrics.sql(sql, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+_cfg = load_metrics_config()
+metrics = Metrics(slow_ms=_cfg['slow_query_ms'], slow_log_path=_cfg['slow_log_path'])
+
+
+def timed(name):
+    """Decorator: record each call of the wrapped function under `name`."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - start)
+        return inner
+    return wrap
+
+
+class StartupClock:
+    """
+    Cold-start milestones, in seconds since `t0` (taken before the heavy
+    imports). Each mark is recorded once, also as a startup.<name> timer;
+    report() appends the launch to the startup log so it can be tracked
+    across releases.
+    """
+
+    def __init__(self, t0):
+        self.t0 = t0
+        self.marks = {}
+        self.reported = False
+
+    def mark(self, name, since=None):
+        """Record `name` now, measured from launch or from an earlier mark."""
+        if name in self.marks or (since and since not in self.marks): return
+        secs = time.perf_counter() - self.t0 - (self.marks[since] if since else 0.0)
+        self.marks[name] = secs
+        metrics.observe(f"startup.{name}", secs)
+        log.info("startup %s: %.0f ms", name, secs * 1000)
+
+    def report(self, path=None):
+        self.reported = True
+        line = {'at': time.strftime("%Y-%m-%d %H:%M:%S"), **{k: round(v * 1000, 1) for k, v in self.marks.items()}}
+        try:
+            with open(path or _cfg['startup_log'], "a", encoding="utf-8") as f:
+                f.write(json.dumps(line) + "\n")
+        except OSError as e:
+            log.warning("startup log not written: %s", e)
+        return line
+
+
+def start_periodic_dump():
+    metrics.start_dump(_cfg['dump_path'], _cfg['dump_interval'])
+    return _cfg['dump_path']
@@ -0,0 +1,131 @@
+import threading
+import time
+
+
+class InventoryCache:
+    """
+    In-process copy of the inventory table, keyed by SKU.
+
+    Rows are served straight from memory for `ttl` seconds. After that the
+    owner is expected to compare the server's change counter against
+    `version` and, when the two differ, patch in just the changed rows from
+    the change feed (apply) or reload the table.
+    """
+
+    def __init__(self, ttl=5.0):
+        self.ttl = ttl
+        self.version = None
+        self._rows = {}        # sku -> row dict
+        self._ordered = None   # rows sorted by item_name, rebuilt lazily
+        self._checked_at = None
+        self._lock = threading.RLock()
+        self.stats = {'hits': 0, 'version_checks': 0, 'reloads': 0, 'deltas': 0}
+
+    @property
+    def loaded(self):
+        return self.version is not None
+
+    def is_fresh(self):
+        with self._lock:
+            return self._checked_at is not None and time.monotonic() - self._checked_at < self.ttl
+
+    def rows(self):
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = sorted(self._rows.values(), key=lambda r: r['item_name'])
+            self.stats['hits'] += 1
+            return list(self._ordered)
+
+    def get(self, sku):
+        with self._lock:
+            return self._rows.get(int(sku))
+
+    def load(self, rows, version):
+        with self._lock:
+            self._rows = {r['sku']: r for r in rows}
+            self._ordered = list(rows)
+            self.version = version
+            self._checked_at = time.monotonic()
+            self.stats['reloads'] += 1
+
+    def confirm(self, version):
+        """Record a version probe; returns True when the cached copy is still current."""
+        with self._lock:
+            self.stats['version_checks'] += 1
+            if version != self.version:
+                return False
+            self._checked_at = time.monotonic()
+            return True
+
+    def apply(self, rows, removed, since, new_version):
+        """
+        Patch in the rows changed between `since` and `new_version` (from the
+        change feed). Returns False, changing nothing, if the cache is no
+        longer at `since` - a local write moved it on while the delta was read.
+        """
+        with self._lock:
+            self.stats['version_checks'] += 1
+            if self.version != since: return False
+            if rows or removed: self.stats['deltas'] += 1
+            renamed = False
+            for row in rows:
+                old = self._rows.get(row['sku'])
+                self._rows[row['sku']] = row
+                renamed = renamed or old is None or old['item_name'] != row['item_name']
+            for sku in removed:
+                renamed = self._rows.pop(int(sku), None) is not None or renamed
+            if renamed:
+                self._ordered = None
+            elif rows and self._ordered is not None:
+                # Same names, same order: swap the new rows in with one pass
+                fresh = {row['sku']: row for row in rows}
+                self._ordered = [fresh.get(r['sku'], r) for r in self._ordered]
+            self.version = new_version
+            self._checked_at = time.monotonic()
+            return True
+
+    def invalidate(self):
+        with self._lock:
+            self.version = None
+            self._checked_at = None
+
+    # --- WRITE-THROUGH PATCHES ---
+    def _advance(self, new_version):
+        # Only move our version forward if no other terminal wrote in between;
+        # otherwise leave it stale so the next probe triggers a reload.
+        if self.version is not None and new_version == self.version + 1:
+            self.version = new_version
+        else:
+            self._checked_at = None
+
+    def _patch(self, row):
+        old = self._rows.get(row['sku'])
+        self._rows[row['sku']] = row
+        if old is None or old['item_name'] != row['item_name']:
+            self._ordered = None
+        elif self._ordered is not None:
+            self._ordered = [row if r['sku'] == row['sku'] else r for r in self._ordered]
+
+    def put(self, row, new_version):
+        with self._lock:
+            if not self.loaded: return
+            self._patch(row)
+            self._advance(new_version)
+
+    def drop(self, sku, new_version):
+        with self._lock:
+            if not self.loaded: return
+            if self._rows.pop(int(sku), None) is not None:
+                self._ordered = None
+            self._advance(new_version)
+
+    def adjust_stock(self, deltas, new_version):
+        """Apply {(sku, size): -qty_sold} after a committed checkout."""
+        with self._lock:
+            if not self.loaded: return
+            for (sku, size), delta in deltas.items():
+                row = self._rows.get(sku)
+                if row is not None:
+                    row['sizes'][size] = row['sizes'].get(size, 0) + delta
+                    row['qty_in_stock'] += delta
+            self._advance(new_version)
@@ -0,0 +1,85 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from instrumentation import metrics, load_metrics_config
+
+
+class MetricsWindow(tk.Toplevel):
+    """Live view of the instrumentation registry: latency table, counters and slow queries."""
+    REFRESH_MS = 2000
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("SmartFit Metrics")
+        self.geometry("1000x650")
+        self.configure(bg="#f8f9fa")
+
+        bar = tk.Frame(self, bg="#f8f9fa")
+        bar.pack(fill="x", padx=10, pady=(10, 0))
+        self.filter_var = tk.StringVar()
+        tk.Label(bar, text="Filter:", bg="#f8f9fa").pack(side="left")
+        tk.Entry(bar, textvariable=self.filter_var, width=30).pack(side="left", padx=5)
+        tk.Button(bar, text="Dump Now", command=self.dump, bg="#2d3436", fg="white", relief=tk.FLAT).pack(side="right", padx=5)
+        tk.Button(bar, text="Reset", command=self.reset, bg="white", relief=tk.FLAT).pack(side="right")
+        self.lbl_info = tk.Label(bar, text="", bg="#f8f9fa", fg="gray")
+        self.lbl_info.pack(side="left", padx=10)
+
+        # Timers
+        cols = ("Name", "Count", "Mean", "p50", "p95", "p99", "Max")
+        self.tree = ttk.Treeview(self, columns=cols, show="headings", height=16)
+        for c in cols:
+            self.tree.heading(c, text=c if c in ("Name", "Count") else f"{c} (ms)")
+            self.tree.column(c, width=420 if c == "Name" else 80, anchor="w" if c == "Name" else "e")
+        self.tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # Counters + slow queries
+        bottom = tk.PanedWindow(self, orient=tk.HORIZONTAL, bg="#f8f9fa")
+        bottom.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.counters = tk.Text(bottom, font=("Courier New", 9), width=40, height=10)
+        self.slow = tk.Text(bottom, font=("Courier New", 9), height=10)
+        bottom.add(self.counters)
+        bottom.add(self.slow)
+
+        self.job = None
+        self.bind("<Destroy>", lambda e: e.widget is self and self.job and self.after_cancel(self.job))
+        self.refresh()
+
+    def refresh(self):
+        snap = metrics.snapshot()
+        needle = self.filter_var.get().strip().lower()
+
+        self.tree.delete(*self.tree.get_children())
+        rows = sorted(snap['timers'].items(), key=lambda kv: -kv[1].get('count', 0) * kv[1].get('mean_ms', 0))
+        for name, t in rows:
+            if needle and needle not in name.lower(): continue
+            if not t.get('count'): continue
+            self.tree.insert("", "end", values=(name, t['count'], t['mean_ms'], t['p50_ms'], t['p95_ms'], t['p99_ms'], t['max_ms']))
+
+        lines = [f"{k:<32} {v}" for k, v in sorted(snap['counters'].items())]
+        for source, values in snap['sources'].items():
+            lines.append("")
+            lines += [f"{source}.{k:<24} {v}" for k, v in values.items()]
+        self._set_text(self.counters, "\n".join(lines))
+        self._set_text(self.slow, f"Slow queries (>= {metrics.slow_ms:.0f} ms)\n" +
+                       "\n".join(f"{ts}  {ms:>8} ms  {sql}" for ts, ms, sql in reversed(snap['slow_queries'])))
+        self.lbl_info.config(text=f"uptime {snap['uptime_s']} s")
+        self.job = self.after(self.REFRESH_MS, self.refresh)
+
+    def _set_text(self, widget, text):
+        widget.config(state="normal")
+        widget.delete("1.0", tk.END)
+        widget.insert("1.0", text)
+        widget.config(state="disabled")
+
+    def dump(self):
+        path = load_metrics_config()['dump_path']
+        try:
+            metrics.dump(path)
+            messagebox.showinfo("Metrics", f"Snapshot written to {path}", parent=self)
+        except OSError as e:
+            messagebox.showerror("Metrics", str(e), parent=self)
+
+    def reset(self):
+        metrics.reset()
+        self.after_cancel(self.job)
+        self.refresh()
@@ -0,0 +1,257 @@
+"""
+Schema migrations.
+
+install_db.DDL_STATEMENTS is the baseline (version 1); every later change
+is a numbered forward migration below. Applied versions are recorded in
+`schema_version`, so running the migrations again only applies what is
+new, and a live store can be upgraded without dropping anything.
+
+Migrations are written once for both backends: `dialect` is "mysql" or
+"sqlite", and the ensure_* helpers check the catalogue first, so each step
+is safe on a database that already has some of the change (for example
+indexes created by an older install_db).
+
+    python install_db.py            # create / upgrade, seed if empty
+    python install_db.py --status   # show applied and pending migrations
+"""
+import datetime
+
+SCHEMA_TABLE = (
+    "CREATE TABLE IF NOT EXISTS schema_version ("
+    "  version INT PRIMARY KEY,"
+    "  name VARCHAR(100) NOT NULL,"
+    "  applied_at DATETIME NOT NULL"
+    ")")
+
+
+# --- CATALOGUE HELPERS ---
+def table_exists(cur, dialect, table):
+    if dialect == "sqlite":
+        cur.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+    else:
+        cur.execute("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s", (table,))
+    return cur.fetchone()[0] > 0
+
+
+def columns(cur, dialect, table):
+    if dialect == "sqlite":
+        cur.execute(f"PRAGMA table_info({table})")
+        return [r[1] for r in cur.fetchall()]
+    cur.execute("SELECT column_name FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = %s", (table,))
+    return [r[0] for r in cur.fetchall()]
+
+
+def indexes(cur, dialect, table):
+    """{index name: (columns in order, unique?)}"""
+    out = {}
+    if dialect == "sqlite":
+        cur.execute(f"PRAGMA index_list({table})")
+        for name, unique in [(r[1], bool(r[2])) for r in cur.fetchall()]:
+            cur.execute(f"PRAGMA index_info({name})")
+            out[name] = ([r[2] for r in sorted(cur.fetchall())], unique)
+        return out
+    cur.execute("SELECT index_name, column_name, non_unique FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = %s ORDER BY index_name, seq_in_index", (table,))
+    for name, col, non_unique in cur.fetchall():
+        out.setdefault(name, ([], not non_unique))[0].append(col)
+    return out
+
+
+def ensure_column(cur, dialect, table, column, ddl):
+    if column not in columns(cur, dialect, table):
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def ensure_index(cur, dialect, table, name, cols, kind="INDEX"):
+    """
+    Add an index unless one with this name exists, or an equivalent one
+    does under another name (MySQL creates one per foreign key on its own,
+    older installs declared some inline).
+    kind is INDEX, UNIQUE or FULLTEXT; FULLTEXT is skipped on SQLite.
+    """
+    if kind == "FULLTEXT" and dialect == "sqlite":
+        return
+    cols = list(cols)
+    existing = indexes(cur, dialect, table)
+    if name in existing: return
+    if kind == "INDEX" and any(c[:len(cols)] == cols for c, _ in existing.values()): return
+    if kind == "UNIQUE" and any(c == cols and u for c, u in existing.values()): return
+    col_sql = ", ".join(cols)
+    if dialect == "sqlite":
+        unique = "UNIQUE " if kind == "UNIQUE" else ""
+        cur.execute(f"CREATE {unique}INDEX IF NOT EXISTS {name} ON {table} ({col_sql})")
+    else:
+        prefix = {"INDEX": "INDEX", "UNIQUE": "UNIQUE INDEX", "FULLTEXT": "FULLTEXT INDEX"}[kind]
+        cur.execute(f"ALTER TABLE {table} ADD {prefix} {name} ({col_sql})")
+
+
+# --- MIGRATIONS ---
+def m001_baseline(cur, dialect):
+    from install_db import DDL_STATEMENTS
+    for ddl in DDL_STATEMENTS.values():
+        if dialect == "sqlite":
+            from sqlite_backend import sqlite_ddl
+            for stmt in sqlite_ddl(ddl):
+                cur.execute(stmt)
+        else:
+            cur.execute(ddl)
+    cur.execute("SELECT COUNT(*) FROM inventory_version")
+    if cur.fetchone()[0] == 0:
+        cur.execute("INSERT INTO inventory_version (id, version) VALUES (1, 0)")
+
+
+def m002_sale_client_ref(cur, dialect):
+    # Till-generated receipt ID; makes offline journal replays idempotent
+    ensure_column(cur, dialect, "sales_log", "client_ref", "VARCHAR(40) NULL")
+    ensure_index(cur, dialect, "sales_log", "uq_sales_client_ref", ["client_ref"], "UNIQUE")
+
+
+def m003_catalogue_indexes(cur, dialect):
+    # ORDER BY item_name (+ sku keyset), category filter, text search
+    ensure_index(cur, dialect, "inventory", "idx_inventory_name", ["item_name"])
+    ensure_index(cur, dialect, "inventory", "idx_inventory_cat", ["category", "item_name"])
+    ensure_index(cur, dialect, "inventory", "ft_inventory_search", ["item_name", "category", "details"], "FULLTEXT")
+
+
+def m004_sales_indexes(cur, dialect):
+    # Date-range reporting, per-client history, receipt line lookup
+    ensure_index(cur, dialect, "sales_log", "idx_sales_date", ["sale_date"])
+    ensure_index(cur, dialect, "sales_log", "idx_sales_client", ["client_id", "sale_date"])
+    ensure_index(cur, dialect, "sales_log", "idx_sales_staff", ["staff_id"])
+    ensure_index(cur, dialect, "sales_items", "idx_sales_items_sale", ["sale_id"])
+    ensure_index(cur, dialect, "sales_items", "idx_sales_items_sku", ["sku"])
+
+
+def m005_client_lookup(cur, dialect):
+    ensure_index(cur, dialect, "clients", "idx_clients_name", ["full_name"])
+    ensure_index(cur, dialect, "clients", "idx_clients_phone", ["contact_no"])
+
+
+def m006_sales_aggregates(cur, dialect):
+    # Daily reporting aggregates, maintained by checkout (see reports.py)
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS sales_daily_orders ("
+        "  sale_day DATE NOT NULL,"
+        "  staff_id INT NOT NULL,"
+        "  payment_method VARCHAR(50) NOT NULL,"
+        "  orders INT NOT NULL DEFAULT 0,"
+        "  subtotal DECIMAL(14, 2) NOT NULL DEFAULT 0,"
+        "  discount DECIMAL(14, 2) NOT NULL DEFAULT 0,"
+        "  grand_total DECIMAL(14, 2) NOT NULL DEFAULT 0,"
+        "  PRIMARY KEY (sale_day, staff_id, payment_method)"
+        ")")
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS sales_daily_lines ("
+        "  sale_day DATE NOT NULL,"
+        "  staff_id INT NOT NULL,"
+        "  payment_method VARCHAR(50) NOT NULL,"
+        "  category VARCHAR(50) NOT NULL,"
+        "  item_size VARCHAR(10) NOT NULL,"
+        "  units INT NOT NULL DEFAULT 0,"
+        "  revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,"
+        "  PRIMARY KEY (sale_day, staff_id, payment_method, category, item_size)"
+        ")")
+    from reports import rebuild_with
+    rebuild_with(cur) # backfill from the existing sales history
+
+
+def m007_client_email_lookup(cur, dialect):
+    # Checkout typeahead searches e-mail addresses by prefix too
+    ensure_index(cur, dialect, "clients", "idx_clients_email", ["email_addr"])
+
+
+def m008_inventory_sizes(cur, dialect):
+    # Per-size stock ledger; checkout locks (sku, size) rows instead of the product row
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS inventory_sizes ("
+        "  sku INT NOT NULL,"
+        "  size VARCHAR(10) NOT NULL,"
+        "  qty INT NOT NULL DEFAULT 0,"
+        "  PRIMARY KEY (sku, size),"
+        "  FOREIGN KEY (sku) REFERENCES inventory(sku)"
+        ")")
+    from sizes import backfill
+    backfill(cur) # existing totals are split evenly over each category's sizes
+
+
+def m009_inventory_changes(cur, dialect):
+    # Change feed: the SKUs touched by each inventory_version bump, so terminals
+    # can pull only what changed (sku 0 = "reload everything")
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS inventory_changes ("
+        "  version BIGINT NOT NULL,"
+        "  sku INT NOT NULL,"
+        "  PRIMARY KEY (version, sku)"
+        ")")
+
+
+
+def m010_default_pricing_rules(cur, dialect):
+    # Stores upgraded past m001 had an empty pricing_rules table; add the defaults
+    # that are missing, leaving any rule the store has already set alone
+    from install_db import DEFAULT_PRICING_RULES
+    verb = "INSERT OR IGNORE" if dialect == "sqlite" else "INSERT IGNORE"
+    cur.executemany(f"{verb} INTO pricing_rules (rule_type, match_value, percent) VALUES (%s, %s, %s)",
+                    DEFAULT_PRICING_RULES)
+
+
+MIGRATIONS = [
+    (1, "baseline schema", m001_baseline),
+    (2, "sales_log.client_ref", m002_sale_client_ref),
+    (3, "catalogue indexes", m003_catalogue_indexes),
+    (4, "sales indexes", m004_sales_indexes),
+    (5, "client lookup indexes", m005_client_lookup),
+    (6, "daily sales aggregates", m006_sales_aggregates),
+    (7, "client e-mail lookup index", m007_client_email_lookup),
+    (8, "per-size stock ledger", m008_inventory_sizes),
+    (9, "inventory change feed", m009_inventory_changes),
+    (10, "default pricing rules", m010_default_pricing_rules),
+]
+LATEST = MIGRATIONS[-1][0]
+
+
+# --- RUNNER ---
+def applied_versions(cur, dialect):
+    if not table_exists(cur, dialect, "schema_version"):
+        return set()
+    cur.execute("SELECT version FROM schema_version")
+    return {r[0] for r in cur.fetchall()}
+
+
+def pending(cur, dialect):
+    done = applied_versions(cur, dialect)
+    return [m for m in MIGRATIONS if m[0] not in done]
+
+
+def migrate(conn, dialect, target=None, log=print):
+    """Apply pending migrations up to `target` (default: all). Returns the versions applied."""
+    cur = conn.cursor()
+    try:
+        cur.execute(SCHEMA_TABLE)
+        conn.commit()
+        ran = []
+        for version, name, fn in pending(cur, dialect):
+            if target is not None and version > target: break
+            # MySQL commits DDL implicitly, which is why every step checks before changing anything
+            fn(cur, dialect)
+            cur.execute("INSERT INTO schema_version (version, name, applied_at) VALUES (%s, %s, %s)",
+                        (version, name, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            conn.commit()
+            log(f" - Applied migration {version}: {name}")
+            ran.append(version)
+        return ran
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def status(conn, dialect):
+    """[(version, name, applied?)] for every known migration."""
+    cur = conn.cursor()
+    try:
+        done = applied_versions(cur, dialect)
+    finally:
+        cur.close()
+    return [(v, name, v in done) for v, name, _ in MIGRATIONS]
@@ -0,0 +1,171 @@
+"""
+Offline checkout journal.
+
+When the database cannot be reached, SmartFitDB.process_transaction records
+the sale here under a locally generated receipt ID ("L-...") and the till
+carries on. The journal is an append-only JSON-lines file, fsync'd on every
+write; a sale's later outcome ("synced" or "conflict") is appended as its
+own record rather than rewriting the original line.
+
+JournalReplayer pushes pending sales to the database in batches once it is
+reachable again. Replays are idempotent: every sale carries its receipt ID
+into sales_log.client_ref (UNIQUE), so a sale that already reached the
+server is acknowledged instead of being written twice.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+
+from instrumentation import metrics
+
+JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "offline_journal.jsonl")
+
+
+def new_ref():
+    """Locally generated receipt ID, unique across tills without coordination."""
+    return f"L-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def is_local_ref(sale_id):
+    return isinstance(sale_id, str) and sale_id.startswith("L-")
+
+
+class OfflineJournal:
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sales = OrderedDict() # ref -> sale record (with 'status' folded in)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path): return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip(): continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue # torn final line from a crash mid-write
+                self._fold(rec)
+
+    def _fold(self, rec):
+        if rec['type'] == 'sale':
+            self._sales[rec['ref']] = dict(rec, status='pending')
+        elif rec['ref'] in self._sales:
+            self._sales[rec['ref']].update(status=rec['type'], **rec.get('info', {}))
+
+    def _append(self, rec):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._fold(rec)
+
+    # --- WRITES ---
+    def record_sale(self, ref, staff_id, client_id, lines, pay_method, voucher, quote, prices):
+        self._append({
+            'type': 'sale', 'ref': ref, 'ts': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'staff_id': staff_id, 'client_id': client_id, 'lines': [list(l) for l in lines],
+            'pay_method': pay_method, 'voucher': voucher,
+            'prices': {str(sku): str(price) for sku, price in prices.items()},
+            'subtotal': str(quote.subtotal), 'discount': str(quote.discount), 'total': str(quote.total),
+        })
+        return ref
+
+    def mark_synced(self, ref, sale_id):
+        self._append({'type': 'synced', 'ref': ref, 'info': {'sale_id': sale_id}})
+
+    def mark_conflict(self, ref, reason):
+        self._append({'type': 'conflict', 'ref': ref, 'info': {'reason': reason}})
+
+    def retry(self, ref):
+        """Put a conflicted sale back in the queue (e.g. after stock was corrected)."""
+        self._append({'type': 'pending', 'ref': ref})
+
+    # --- READS ---
+    def get(self, ref):
+        return self._sales.get(ref)
+
+    def pending(self, limit=None):
+        out = [s for s in self._sales.values() if s['status'] == 'pending']
+        return out[:limit] if limit else out
+
+    def conflicts(self):
+        return [s for s in self._sales.values() if s['status'] == 'conflict']
+
+    def compact(self):
+        """Drop synced sales from the file once nothing is in flight (atomic rewrite)."""
+        with self._lock:
+            keep = [s for s in self._sales.values() if s['status'] != 'synced']
+            if len(keep) == len(self._sales): return
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for s in keep:
+                    rec = {k: v for k, v in s.items() if k not in ('status', 'reason', 'sale_id')}
+                    f.write(json.dumps(rec, default=str) + "\n")
+                    if s['status'] == 'conflict':
+                        f.write(json.dumps({'type': 'conflict', 'ref': s['ref'], 'info': {'reason': s.get('reason')}}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._sales = OrderedDict((s['ref'], s) for s in keep)
+
+
+class JournalReplayer(threading.Thread):
+    """Background thread that drains the journal into the database once it is reachable."""
+
+    def __init__(self, db, interval=10.0, batch_size=50):
+        super().__init__(name="journal-replayer", daemon=True)
+        self.db = db
+        self.journal = db.journal
+        self.interval = interval
+        self.batch_size = batch_size
+        self._halt = threading.Event()
+        self._busy = threading.Lock() # the timer and a manual "sync now" must not replay the same batch twice
+        self.stats = {'synced': 0, 'conflicts': 0, 'attempts': 0, 'failures': 0, 'last_error': None}
+        metrics.add_source("journal_replay", lambda: dict(self.stats))
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            self.replay_once()
+
+    def replay_once(self):
+        """Push one batch; returns the number of sales synced or conflicted."""
+        with self._busy:
+            batch = self.journal.pending(self.batch_size)
+            if not batch: return 0
+            self.stats['attempts'] += 1
+            try:
+                results = self.db.replay_sales(batch)
+            except Exception as e:
+                if self.db.is_connection_error(e): return 0 # still offline, try again next tick
+                self.stats['failures'] += 1
+                self.stats['last_error'] = str(e)
+                metrics.error("journal", e)
+                return 0
+            self._record(results)
+            return len(results)
+
+    def _record(self, results):
+        for ref, ok, info in results:
+            if ok:
+                self.journal.mark_synced(ref, info)
+                self.stats['synced'] += 1
+            else:
+                self.journal.mark_conflict(ref, info)
+                self.stats['conflicts'] += 1
+        if not self.journal.pending():
+            self.journal.compact()
+
+    def stop(self):
+        self._halt.set()
+
+
+def quote_from_entry(entry):
+    """The totals a journaled sale was charged at, as Decimals."""
+    return Decimal(entry['subtotal']), Decimal(entry['discount']), Decimal(entry['total'])
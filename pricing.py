@@ -0,0 +1,104 @@
+"""
+Pricing engine.
+
+Discount rules live in the `pricing_rules` table and are loaded once and
+cached. Three rule types are supported:
+
+  tier      match_value = clients.client_type   -> % off the order
+  voucher   match_value = voucher code          -> % off the order
+  category  match_value = inventory.category    -> % off lines in that category
+
+Category promos are taken off their lines first; tier and voucher
+percentages are then added together and applied to what is left.
+All arithmetic is Decimal, rounded to cents.
+"""
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+from cart import cart_lines
+
+CENTS = Decimal("0.01")
+HUNDRED = Decimal("100")
+
+Quote = namedtuple("Quote", "subtotal discount total")
+
+
+def to_money(value):
+    return Decimal(str(value)).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+class PricingEngine:
+    def __init__(self, db, ttl=600.0):
+        self.db = db
+        self.ttl = ttl
+        self._rules = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    # --- RULES ---
+    def rules(self):
+        """{rule_type: {match_value: percent}}, reloaded at most every `ttl` seconds."""
+        with self._lock:
+            if self._rules is None or time.monotonic() - self._loaded_at > self.ttl:
+                try:
+                    rows = self.db.fetch_pricing_rules()
+                except Exception:
+                    if self._rules is None: raise
+                    # Database unreachable: keep charging the last known rules, retry after ttl
+                    self._loaded_at = time.monotonic()
+                    return self._rules
+                table = {'tier': {}, 'voucher': {}, 'category': {}}
+                for r in rows:
+                    table.setdefault(r['rule_type'], {})[r['match_value']] = Decimal(str(r['percent']))
+                self._rules = table
+                self._loaded_at = time.monotonic()
+            return self._rules
+
+    def reload(self):
+        with self._lock:
+            self._rules = None
+
+    def voucher_percent(self, code):
+        """Percent off for a voucher code, or None if the code is not valid."""
+        return self.rules()['voucher'].get((code or "").strip())
+
+    # --- QUOTING ---
+    def quote_one(self, cart, client_type=None, voucher=None, inventory=None):
+        """
+        Price one cart. `inventory` is a {sku: row} snapshot providing
+        unit_price and category; the cached catalogue is used when omitted.
+        Lines for unknown SKUs are ignored.
+        """
+        rules = self.rules()
+        if inventory is None:
+            inventory = {i['sku']: i for i in self.db.fetch_inventory()}
+
+        subtotal = promo = Decimal("0.00")
+        for sku, _, qty in cart_lines(cart):
+            item = inventory.get(sku)
+            if item is None: continue
+            line = to_money(item['unit_price']) * qty
+            subtotal += line
+            pct = rules['category'].get(item['category'])
+            if pct:
+                promo += (line * pct / HUNDRED).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+        pct = rules['tier'].get(client_type, Decimal("0"))
+        if voucher:
+            pct += rules['voucher'].get(voucher.strip(), Decimal("0"))
+        order_disc = ((subtotal - promo) * pct / HUNDRED).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+        discount = promo + order_disc
+        return Quote(subtotal, discount, subtotal - discount)
+
+    def quote(self, carts, inventory=None):
+        """
+        Batch pricing: `carts` is an iterable of (cart, client_type, voucher)
+        tuples, all priced against one inventory snapshot and one rule set.
+        Returns a list of Quotes in the same order.
+        """
+        if inventory is None:
+            inventory = {i['sku']: i for i in self.db.fetch_inventory()}
+        return [self.quote_one(cart, client_type, voucher, inventory) for cart, client_type, voucher in carts]
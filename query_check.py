@@ -0,0 +1,174 @@
+"""
+Query plan check.
+
+Runs every SmartFitDB operation once against the configured database,
+captures the statements it issues, and EXPLAINs each SELECT/UPDATE/DELETE.
+Writes are rolled back, so it is safe to run against a live store. Full
+table scans and full index scans (MySQL type=index) are flagged, except
+where reading the whole table is the point (ALLOWED_SCANS). An index scan
+under a LIMIT walks the index in ORDER BY order and stops early (keyset
+pages), so it is reported but not flagged.
+
+    python query_check.py      # exits 1 if an unexpected full scan is found
+"""
+import re
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from db_manager import open_db
+from instrumentation import normalize_sql
+
+# Operations that are meant to read a whole (small or cached) table
+ALLOWED_SCANS = {"fetch_inventory", "fetch_clients", "fetch_pricing_rules"}
+# Text search on SQLite is LIKE '%word%' (no FULLTEXT), which cannot use an index;
+# client prefix LIKEs are case-insensitive there and only use an index on NOCASE columns
+ALLOWED_SCANS_SQLITE = {"search_inventory(text)", "search_clients(name)", "search_clients(phone)"}
+
+
+class _Recorder:
+    def __init__(self, cur, seen, state):
+        self._cur, self._seen, self._state = cur, seen, state
+
+    def _note(self, sql, params):
+        key = normalize_sql(sql, width=None) # full text: long statements can share a prefix
+        if key not in self._seen:
+            self._seen[key] = (self._state['label'], sql, params)
+
+    def execute(self, sql, params=None):
+        self._note(sql, params)
+        return self._cur.execute(sql) if params is None else self._cur.execute(sql, params)
+
+    def executemany(self, sql, seq):
+        seq = list(seq)
+        if seq: self._note(sql, seq[0])
+        return self._cur.executemany(sql, seq)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+class _NoCommit:
+    """Connection proxy that turns commit() into rollback()."""
+    def __init__(self, conn): self._conn = conn
+    def commit(self): self._conn.rollback()
+    def __getattr__(self, name): return getattr(self._conn, name)
+
+
+def capture(db):
+    """Run one of each SmartFitDB operation; returns {statement key: (operation, sql, params)}."""
+    seen, state = OrderedDict(), {'label': None}
+    real_cursor = db._cursor
+
+    @contextmanager
+    def recording(dictionary=False):
+        with real_cursor(dictionary) as (conn, cur):
+            yield _NoCommit(conn), _Recorder(cur, seen, state)
+
+    def run(label, fn, *args, **kwargs):
+        state['label'] = label
+        return fn(*args, **kwargs)
+
+    db._cursor = recording
+    try:
+        db.inventory_cache.invalidate()
+        items = run("fetch_inventory", db.fetch_inventory)
+        run("verify_login", db.verify_login, "nobody", "nothing")
+        run("fetch_inventory_since", db.fetch_inventory_since, 0)
+        run("search_inventory", db.search_inventory, "", limit=20)
+        run("search_inventory(text)", db.search_inventory, "shirt", limit=20)
+        run("search_inventory(short)", db.search_inventory, "ab", limit=20)
+        if items:
+            first = items[0]
+            run("search_inventory(category)", db.search_inventory, "", category=first['category'],
+                limit=20, after=(first['item_name'], first['sku']))
+        run("fetch_pricing_rules", db.fetch_pricing_rules)
+        clients = run("fetch_clients", db.fetch_clients)
+        run("search_clients", db.search_clients, "", limit=10)
+        run("search_clients(name)", db.search_clients, "Ni", limit=10)
+        run("search_clients(phone)", db.search_clients, "98", limit=10, after=("98", 0))
+        if clients:
+            run("get_client", db.get_client, clients[0]['client_id'])
+        in_stock = [i for i in items if i['qty_in_stock'] > 0]
+        if in_stock:
+            client_id = clients[0]['client_id'] if clients else None
+            size = next(sz for sz, q in in_stock[0]['sizes'].items() if q > 0)
+            run("process_transaction", db.process_transaction, 1, client_id, [(in_stock[0]['sku'], size, 1)], "Cash")
+            i = in_stock[0]
+            run("update_product", db.update_product, i['sku'], i['item_name'], i['category'], i['unit_price'],
+                i['qty_in_stock'], i['image_path'], i['details'])
+            run("remove_item", db.remove_item, i['sku'])
+        with real_cursor() as (conn, cur):
+            cur.execute("SELECT MAX(sale_id) FROM sales_log")
+            sale_id = cur.fetchone()[0]
+        if sale_id:
+            run("get_order_details", db.get_order_details, sale_id)
+            run("get_orders_details(ids)", lambda: list(db.get_orders_details([sale_id])))
+            run("get_orders_details(range)", lambda: list(db.get_orders_details(start="2000-01-01", end="2000-01-31", chunk=1)))
+    finally:
+        del db._cursor
+        db.inventory_cache.invalidate() # write-through patches above were rolled back
+    return seen
+
+
+def explain(cur, dialect, sql, params):
+    """[(table, access, detail)], access being 'scan', 'index scan' or 'lookup'."""
+    plan = []
+    if dialect == "sqlite":
+        cur.execute("EXPLAIN QUERY PLAN " + sql, params or ())
+        for row in cur.fetchall():
+            detail = row[-1]
+            words = detail.split()
+            if words[0] == "SCAN" and len(words) > 1 and words[1] != "CONSTANT":
+                access = "index scan" if "INDEX" in detail else "scan"
+                plan.append((words[1], access, detail))
+            elif words[0] == "SEARCH":
+                plan.append((words[1], "lookup", detail))
+        return plan
+
+    cur.execute("EXPLAIN " + sql, params or ())
+    cols = [d[0].lower() for d in cur.description]
+    for row in cur.fetchall():
+        r = dict(zip(cols, row))
+        access = {"ALL": "scan", "index": "index scan"}.get(r.get('type'), "lookup")
+        plan.append((r.get('table'), access, f"type={r.get('type')} key={r.get('key')} rows={r.get('rows')} {r.get('extra') or ''}".strip()))
+    return plan
+
+
+def bounded(sql):
+    return re.search(r"\bLIMIT\b", sql, re.IGNORECASE) is not None
+
+
+def check(db=None, out=print):
+    """EXPLAIN everything SmartFitDB runs; returns the unexpected full table and index scans."""
+    db = db or open_db()
+    allowed = ALLOWED_SCANS | (ALLOWED_SCANS_SQLITE if db.DIALECT == "sqlite" else set())
+    problems = []
+    statements = capture(db)
+    with db.session() as conn:
+        cur = conn.cursor()
+        try:
+            for key, (label, sql, params) in statements.items():
+                if not key.split()[0].upper() in ("SELECT", "UPDATE", "DELETE"): continue
+                for table, access, detail in explain(cur, db.DIALECT, sql, params):
+                    flag = ""
+                    if access == "scan" or (access == "index scan" and not bounded(sql)):
+                        flag = "ok (expected)" if label in allowed else ("FULL SCAN" if access == "scan" else "FULL INDEX SCAN")
+                        if label not in allowed: problems.append((label, table, key))
+                    elif access == "index scan":
+                        flag = "ok (LIMIT)"
+                    out(f"{label:<28} {table or '-':<14} {access:<10} {flag:<15} {detail}")
+        finally:
+            conn.rollback()
+            cur.close()
+    return problems
+
+
+if __name__ == "__main__":
+    found = check()
+    if found:
+        print(f"\n[WARN] {len(found)} unexpected full scan(s):")
+        for label, table, key in found:
+            print(f" - {label}: {table}  <- {key}")
+        sys.exit(1)
+    print("\n[OK] No unexpected full scans.")
@@ -0,0 +1,111 @@
+"""
+Receipt text.
+
+The layout is the one the till has always printed; it is split into
+header / line / footer templates once at import, and each receipt is built
+with a single join rather than repeated concatenation.
+
+Bulk export streams SmartFitDB.get_orders_details() for a date range into
+one text file (receipts separated by a form feed) or a zip archive with one
+Receipt_<id>.txt per sale, so memory stays flat however many receipts
+there are:
+
+    python receipts.py 2026-01-01 2026-03-31 audit_q1.zip
+"""
+import os
+import time
+import zipfile
+
+from offline_journal import is_local_ref
+
+RULE = "=" * 42
+LINE_RULE = "-" * 42
+
+HEADER = "\n".join([
+    "",
+    RULE,
+    "           SMARTFIT POS SYSTEM",
+    RULE,
+    "Receipt ID: {oid}",
+    "Date:       {sale_date}",
+    "Staff:      {staff_name}",
+    "Client:     {client_name}",
+    "Payment:    {payment_method}",
+    LINE_RULE,
+    "ITEM                QTY     PRICE",
+    LINE_RULE,
+    "",
+]).format
+LINE = "{name:<25} x{qty:<3} ${price}\n".format
+FOOTER = "\n".join([
+    LINE_RULE,
+    "Subtotal:   ${subtotal}",
+    "Discount:  -${discount_amount}",
+    LINE_RULE,
+    "TOTAL:      ${grand_total}",
+    RULE,
+    "Thank you for shopping!",
+    "",
+]).format
+OFFLINE_NOTE = "(Offline sale - will sync to the server)\n"
+
+
+def format_receipt(oid, head, items):
+    """Receipt text for one sale (header dict and item dicts as returned by get_order_details)."""
+    parts = [HEADER(oid=oid, sale_date=head['sale_date'], staff_name=head['staff_name'],
+                    client_name=head['client_name'], payment_method=head['payment_method'])]
+    parts.extend(LINE(name=f"{i['item_name']} ({i['item_size']})"[:25], qty=i['qty'], price=i['sold_at_price'])
+                 for i in items)
+    parts.append(FOOTER(subtotal=head['subtotal'], discount_amount=head['discount_amount'], grand_total=head['grand_total']))
+    if is_local_ref(oid):
+        parts.append(OFFLINE_NOTE)
+    return "".join(parts)
+
+
+def export_receipts(db, path, start, end, progress=None, chunk=500):
+    """
+    Write every receipt dated start..end to `path`: a .zip gets one member
+    per receipt, anything else one text file. Returns the number written.
+    progress({'written', 'seconds'}) is called after each chunk.
+    """
+    began = time.perf_counter()
+    written = 0
+    tmp = path + ".part"
+    as_zip = path.lower().endswith(".zip")
+
+    def tick():
+        if progress and written % chunk == 0:
+            progress({'written': written, 'seconds': time.perf_counter() - began})
+
+    if as_zip:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for head, items in db.get_orders_details(start=start, end=end, chunk=chunk):
+                zf.writestr(f"Receipt_{head['sale_id']}.txt", format_receipt(head['sale_id'], head, items))
+                written += 1
+                tick()
+    else:
+        with open(tmp, "w", encoding="utf-8") as f:
+            for head, items in db.get_orders_details(start=start, end=end, chunk=chunk):
+                if written: f.write("\f")
+                f.write(format_receipt(head['sale_id'], head, items))
+                written += 1
+                tick()
+    os.replace(tmp, path)
+    if progress: progress({'written': written, 'seconds': time.perf_counter() - began})
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    from db_manager import open_db
+
+    ap = argparse.ArgumentParser(description="Export SmartFit receipts for a date range")
+    ap.add_argument("start", help="first day (YYYY-MM-DD)")
+    ap.add_argument("end", help="last day (YYYY-MM-DD)")
+    ap.add_argument("path", help="output .txt or .zip")
+    args = ap.parse_args()
+    db = open_db()
+    n = export_receipts(db, args.path, args.start, args.end,
+                        progress=lambda p: print(f"\r {p['written']:,} receipts", end=""))
+    print(f"\n[OK] {n} receipts written to {args.path}")
+    db.close()
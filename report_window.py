@@ -0,0 +1,143 @@
+import datetime
+import os
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+from receipts import export_receipts
+from reports import summary, last_days
+
+GROUPINGS = {
+    "Day": ("sale_day",),
+    "Staff": ("staff_id",),
+    "Payment Method": ("payment_method",),
+    "Category": ("category",),
+    "Size": ("item_size",),
+    "Category + Size": ("category", "item_size"),
+    "Day + Staff": ("sale_day", "staff_id"),
+    "Staff + Payment": ("staff_id", "payment_method"),
+}
+HEADINGS = {
+    'sale_day': "Date", 'staff_name': "Staff", 'payment_method': "Payment", 'category': "Category", 'item_size': "Size",
+    'orders': "Orders", 'subtotal': "Subtotal", 'discount': "Discount", 'grand_total': "Revenue",
+    'units': "Units", 'revenue': "Gross Sales",
+}
+
+
+class ReportWindow(tk.Toplevel):
+    """Manager sales report. Reads only the daily aggregate tables (see reports.py)."""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.controller = parent
+        self.title("SmartFit Sales Report")
+        self.geometry("900x600")
+        self.configure(bg="#f8f9fa")
+
+        bar = tk.Frame(self, bg="#f8f9fa", pady=10)
+        bar.pack(fill="x", padx=10)
+        start, end = last_days(30)
+        tk.Label(bar, text="From", bg="#f8f9fa").pack(side="left")
+        self.e_from = tk.Entry(bar, width=12); self.e_from.insert(0, str(start)); self.e_from.pack(side="left", padx=5)
+        tk.Label(bar, text="To", bg="#f8f9fa").pack(side="left")
+        self.e_to = tk.Entry(bar, width=12); self.e_to.insert(0, str(end)); self.e_to.pack(side="left", padx=5)
+        tk.Label(bar, text="Group by", bg="#f8f9fa").pack(side="left", padx=(15, 0))
+        self.c_group = ttk.Combobox(bar, values=list(GROUPINGS), state="readonly", width=18)
+        self.c_group.current(0)
+        self.c_group.pack(side="left", padx=5)
+        self.c_group.bind("<<ComboboxSelected>>", lambda e: self.run())
+        self.run_btn = tk.Button(bar, text="RUN", command=self.run, bg="#2d3436", fg="white", relief=tk.FLAT, padx=15)
+        self.run_btn.pack(side="left", padx=10)
+        tk.Button(bar, text="EXPORT RECEIPTS", command=self.export, bg="#0984e3", fg="white", relief=tk.FLAT, padx=10).pack(side="right")
+        self.export_q = queue.Queue()
+        self.exporting = False
+
+        self.tree = ttk.Treeview(self, show="headings")
+        self.tree.pack(fill="both", expand=True, padx=10)
+        self.lbl_total = tk.Label(self, text="", bg="#f8f9fa", font=("Arial", 11, "bold"), anchor="e")
+        self.lbl_total.pack(fill="x", padx=10, pady=10)
+        self.run()
+
+    def dates(self):
+        try:
+            return (datetime.date.fromisoformat(self.e_from.get().strip()),
+                    datetime.date.fromisoformat(self.e_to.get().strip()))
+        except ValueError:
+            messagebox.showerror("Report", "Dates must be YYYY-MM-DD", parent=self)
+            return None
+
+    def run(self):
+        span = self.dates()
+        if not span: return
+        start, end = span
+        by = GROUPINGS[self.c_group.get()]
+        self.lbl_total.config(text="Loading...")
+        self.run_btn.config(state="disabled")
+        self.controller.worker.submit(summary, self.controller.db, start, end, by,
+                                      on_done=lambda rows: self.show(by, rows), on_error=self.failed, key="sales-report")
+
+    def failed(self, err):
+        if not self.winfo_exists(): return
+        self.run_btn.config(state="normal")
+        self.lbl_total.config(text=f"Could not load the report: {err}")
+
+    def show(self, by, rows):
+        if not self.winfo_exists(): return
+        self.run_btn.config(state="normal")
+        dims = ["staff_name" if d == "staff_id" else d for d in by]
+        measures = ["units", "revenue"] if "category" in by or "item_size" in by else ["orders", "subtotal", "discount", "grand_total"]
+        cols = dims + measures
+        self.tree.delete(*self.tree.get_children())
+        self.tree["columns"] = cols
+        for c in cols:
+            self.tree.heading(c, text=HEADINGS[c])
+            self.tree.column(c, width=140, anchor="w" if c in dims else "e")
+        for r in rows:
+            self.tree.insert("", "end", values=[r.get(c) if r.get(c) is not None else "-" for c in cols])
+
+        money = measures[-1]
+        total = sum((r[money] for r in rows), 0)
+        count = sum(r[measures[0]] for r in rows)
+        self.lbl_total.config(text=f"{HEADINGS[measures[0]]}: {count:,}    {HEADINGS[money]}: ${total:,.2f}")
+
+    def export(self):
+        # Long audits run on their own thread so the shared DB worker stays free
+        span = self.dates()
+        if not span or self.exporting: return
+        start, end = span
+        path = filedialog.asksaveasfilename(
+            parent=self, initialfile=f"Receipts_{start}_{end}.zip", defaultextension=".zip",
+            filetypes=[("Zip Archive", "*.zip"), ("Text Document", "*.txt")])
+        if not path: return
+        self.exporting = True
+        self.lbl_total.config(text="Exporting receipts...")
+
+        def work():
+            try:
+                n = export_receipts(self.controller.db, path, start, end,
+                                    progress=lambda p: self.export_q.put(('progress', p)))
+                self.export_q.put(('done', n))
+            except Exception as e:
+                self.export_q.put(('error', e))
+        threading.Thread(target=work, daemon=True).start()
+        self.after(100, lambda: self.poll_export(path))
+
+    def poll_export(self, path):
+        if not self.winfo_exists(): return
+        while True:
+            try:
+                kind, payload = self.export_q.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.lbl_total.config(text=f"Exporting receipts... {payload['written']:,}")
+                continue
+            self.exporting = False
+            if kind == 'error':
+                messagebox.showerror("Export", str(payload), parent=self)
+            else:
+                messagebox.showinfo("Export", f"{payload:,} receipts written to {os.path.basename(path)}.", parent=self)
+            self.run()
+            return
+        self.after(100, lambda: self.poll_export(path))
@@ -0,0 +1,144 @@
+"""
+Sales reporting.
+
+Two summary tables are maintained incrementally inside the checkout
+transaction (SmartFitDB._write_sale -> record_sale), so reports never
+scan sales_log / sales_items:
+
+  sales_daily_orders  (sale_day, staff_id, payment_method)
+                      orders, subtotal, discount, grand_total
+  sales_daily_lines   (sale_day, staff_id, payment_method, category, item_size)
+                      units, revenue (gross line value, before order discounts)
+
+Order-level totals live in their own table because discounts apply to the
+whole order and cannot be split exactly by category or size.
+
+Backfill or repair after imports or manual edits with:
+
+    python reports.py --rebuild [--since 2026-01-01]
+"""
+import datetime
+from decimal import Decimal
+
+from pricing import to_money
+
+ORDER_DIMS = ("sale_day", "staff_id", "payment_method")
+LINE_DIMS = ORDER_DIMS + ("category", "item_size")
+ORDER_MEASURES = ("orders", "subtotal", "discount", "grand_total")
+LINE_MEASURES = ("units", "revenue")
+MONEY = ("subtotal", "discount", "grand_total", "revenue")
+
+
+# --- INCREMENTAL UPDATE (inside the checkout transaction) ---
+def record_sale(db, cur, day, staff_id, pay_method, quote, lines, snapshot, prices):
+    """
+    Fold one committed-to-be sale into the aggregates. `day` is a
+    'YYYY-MM-DD' string, or None for the database's CURRENT_DATE (matching
+    the sale_date default). `lines` are (sku, size, qty).
+    """
+    pay_method = pay_method or ""
+    cur.execute(
+        "INSERT INTO sales_daily_orders (sale_day, staff_id, payment_method, orders, subtotal, discount, grand_total) "
+        "VALUES (COALESCE(%s, CURRENT_DATE), %s, %s, 1, %s, %s, %s)" + db._upsert_clause(", ".join(ORDER_DIMS), add=ORDER_MEASURES),
+        (day, staff_id, pay_method, quote.subtotal, quote.discount, quote.total))
+
+    groups = {}
+    for sku, size, qty in lines:
+        key = (snapshot[sku]['category'], size or "")
+        units, revenue = groups.get(key, (0, Decimal("0.00")))
+        groups[key] = (units + qty, revenue + Decimal(str(prices[sku])) * qty)
+    marks = "(COALESCE(%s, CURRENT_DATE), %s, %s, %s, %s, %s, %s)"
+    cur.execute(
+        f"INSERT INTO sales_daily_lines ({', '.join(LINE_DIMS + LINE_MEASURES)}) VALUES " + ", ".join([marks] * len(groups))
+        + db._upsert_clause(", ".join(LINE_DIMS), add=LINE_MEASURES),
+        [v for (cat, size), (units, revenue) in groups.items() for v in (day, staff_id, pay_method, cat, size, units, revenue)])
+
+
+# --- BACKFILL ---
+def rebuild(db, since=None):
+    """Recompute the aggregates from sales_log/sales_items (all days, or from `since` on)."""
+    with db._cursor() as (conn, cur):
+        rebuild_with(cur, since)
+        conn.commit()
+
+
+def rebuild_with(cur, since=None):
+    where, params = "", ()
+    if since:
+        where, params = " WHERE s.sale_date >= %s", (str(since),)
+    for table in ("sales_daily_orders", "sales_daily_lines"):
+        if since: cur.execute(f"DELETE FROM {table} WHERE sale_day >= %s", (str(since),))
+        else: cur.execute(f"DELETE FROM {table}")
+    cur.execute(
+        "INSERT INTO sales_daily_orders (sale_day, staff_id, payment_method, orders, subtotal, discount, grand_total) "
+        "SELECT DATE(s.sale_date), s.staff_id, COALESCE(s.payment_method, ''), COUNT(*), SUM(s.subtotal), "
+        "SUM(s.discount_amount), SUM(s.grand_total) FROM sales_log s" + where +
+        " GROUP BY DATE(s.sale_date), s.staff_id, COALESCE(s.payment_method, '')", params)
+    cur.execute(
+        "INSERT INTO sales_daily_lines (sale_day, staff_id, payment_method, category, item_size, units, revenue) "
+        "SELECT DATE(s.sale_date), s.staff_id, COALESCE(s.payment_method, ''), p.category, COALESCE(i.item_size, ''), "
+        "SUM(i.qty), SUM(i.qty * i.sold_at_price) "
+        "FROM sales_log s JOIN sales_items i ON i.sale_id = s.sale_id JOIN inventory p ON p.sku = i.sku" + where +
+        " GROUP BY DATE(s.sale_date), s.staff_id, COALESCE(s.payment_method, ''), p.category, COALESCE(i.item_size, '')", params)
+
+
+# --- QUERIES (aggregates only) ---
+def summary(db, start, end, by=("sale_day",), staff_id=None, payment_method=None):
+    """
+    Rows grouped by `by` for start..end (inclusive dates). Grouping by
+    category or item_size reads sales_daily_lines (units, revenue); any
+    other grouping reads sales_daily_orders (orders, subtotal, discount,
+    grand_total). staff_id is returned with the staff display name.
+    """
+    lines = any(d in ("category", "item_size") for d in by)
+    dims = LINE_DIMS if lines else ORDER_DIMS
+    for d in by:
+        if d not in dims: raise ValueError(f"cannot group by {d!r}")
+    table = "sales_daily_lines" if lines else "sales_daily_orders"
+    measures = LINE_MEASURES if lines else ORDER_MEASURES
+
+    where, params = ["a.sale_day BETWEEN %s AND %s"], [str(start), str(end)]
+    if staff_id is not None:
+        where.append("a.staff_id = %s"); params.append(staff_id)
+    if payment_method:
+        where.append("a.payment_method = %s"); params.append(payment_method)
+
+    cols = [f"a.{d}" for d in by]
+    select = cols + [f"SUM(a.{m}) AS {m}" for m in measures]
+    join = ""
+    if "staff_id" in by:
+        select.append("MAX(u.display_name) AS staff_name")
+        join = " LEFT JOIN staff_users u ON u.uid = a.staff_id"
+    sql = (f"SELECT {', '.join(select)} FROM {table} a{join} WHERE {' AND '.join(where)}"
+           f" GROUP BY {', '.join(cols)} ORDER BY {', '.join(cols)}")
+    with db._cursor(dictionary=True) as (conn, cur):
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    for r in rows:
+        for m in MONEY:
+            if r.get(m) is not None: r[m] = to_money(r[m])
+    return rows
+
+
+def last_days(n=30):
+    end = datetime.date.today()
+    return end - datetime.timedelta(days=n - 1), end
+
+
+if __name__ == "__main__":
+    import argparse
+    from db_manager import open_db
+
+    ap = argparse.ArgumentParser(description="SmartFit sales aggregates")
+    ap.add_argument("--rebuild", action="store_true", help="recompute the daily aggregates from the sales history")
+    ap.add_argument("--since", help="only rebuild days from this date (YYYY-MM-DD)")
+    args = ap.parse_args()
+    db = open_db()
+    if args.rebuild:
+        rebuild(db, args.since)
+        print("[OK] Sales aggregates rebuilt.")
+    else:
+        start, end = last_days(30)
+        for row in summary(db, start, end):
+            print(f" {row['sale_day']}  {row['orders']:>5} orders  ${row['grand_total']}")
+    db.close()
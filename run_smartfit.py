@@ -1,21 +1,52 @@
+import time
+T0 = time.perf_counter() # before any heavy import, for the startup report
+
+import importlib
+import logging
 import tkinter as tk
 from tkinter import messagebox
-from db_manager import SmartFitDB
-from store_front import StorePage, CartPage, CheckoutPage, ReceiptPage
-from stock_admin import InventoryWindow
-from crm_admin import ClientWindow
+from db_manager import open_db
+from db_worker import DBWorker
+from instrumentation import metrics, start_periodic_dump, load_metrics_config, StartupClock
+from offline_journal import JournalReplayer
+from cart import Cart
+
+# Imported on first use: the store pages pull in PIL, the admin windows are Manager-only
+PAGES = {
+    "StorePage": "store_front", "CartPage": "store_front",
+    "CheckoutPage": "store_front", "ReceiptPage": "store_front",
+}
+INVENTORY_POLL_MS = 3000 # other tills' stock changes
+
+ADMIN = {
+    "Inventory Manager": ("stock_admin", "InventoryWindow", True),
+    "Client Manager": ("crm_admin", "ClientWindow", True),
+    "Sales Report": ("report_window", "ReportWindow", False),
+    "Metrics": ("metrics_window", "MetricsWindow", False),
+}
 
 class SmartFitLauncher(tk.Tk):
     def __init__(self):
         # FIX: Removed 'parent=None' here. This was causing your crash.
         super().__init__()
+        self.clock = StartupClock(T0)
+        self.clock.mark("imports")
         self.title("SmartFit - Retail System v4.0")
         self.geometry("1200x800")
         
-        self.db = SmartFitDB()
+        self.db = open_db() # MySQL or SQLite, see smartfit.ini
+        self.worker = DBWorker(self) # all DB calls from Tk callbacks go through here
         self.active_user = None 
-        self.cart = {} # {sku: qty}
+        self.cart = Cart() # (sku, size) -> qty
         self.last_order_id = None
+
+        # Sales taken while the database was down are pushed back in the background
+        self.replayer = JournalReplayer(self.db)
+        self.replayer.start()
+        self.seen_conflicts = set()
+        self.after(5000, self.watch_journal)
+        self.after(INVENTORY_POLL_MS, self.watch_inventory)
+        start_periodic_dump() # see [metrics] in smartfit.ini
         
         # Navigation Container
         self.container = tk.Frame(self)
@@ -27,9 +58,30 @@ class SmartFitLauncher(tk.Tk):
         
         # Init Login
         self.render_login()
+        self.after_idle(self.on_login_shown)
+        # Warm up while staff type their password
+        self.worker.submit(self.prefetch, on_done=lambda _: self.clock.mark("prefetched"),
+                           on_error=lambda e: metrics.error("prefetch", e), key="prefetch")
+
+    def prefetch(self):
+        importlib.import_module("store_front")
+        self.db.fetch_inventory()
+        self.db.pricing.rules()
+
+    def on_login_shown(self):
+        self.update_idletasks()
+        self.clock.mark("login_window")
+
+    def on_first_paint(self, e=None):
+        if self.clock.reported: return
+        self.update_idletasks()
+        self.clock.mark("first_paint")
+        self.clock.mark("login_to_paint", since="logged_in")
+        self.clock.report()
 
     def render_login(self):
         for w in self.container.winfo_children(): w.destroy()
+        self.frames = {}
         
         # Login Design: Minimalist Dark
         bg_frame = tk.Frame(self.container, bg="#2d3436")
@@ -49,49 +101,106 @@ class SmartFitLauncher(tk.Tk):
         p = tk.Entry(box, show="*", font=("Arial", 12), bg="#f1f2f6", relief=tk.FLAT)
         p.pack(pady=(0, 20), fill="x", ipadx=5, ipady=5)
         
-        def auth():
-            usr = self.db.verify_login(u.get(), p.get())
+        def on_login(usr):
+            login_btn.config(state="normal", text="LOGIN")
             if usr:
                 self.active_user = usr
+                self.clock.mark("logged_in")
                 self.init_dashboard()
             else:
                 messagebox.showerror("Access Denied", "Invalid Username or Password")
 
-        tk.Button(box, text="LOGIN", command=auth, bg="#00b894", fg="white", font=("Arial", 11, "bold"), relief=tk.FLAT, cursor="hand2").pack(fill="x", pady=10)
+        def on_fail(err):
+            login_btn.config(state="normal", text="LOGIN")
+            messagebox.showerror("Database Error", str(err))
+
+        def auth():
+            login_btn.config(state="disabled", text="Signing in...")
+            self.worker.submit(self.db.verify_login, u.get(), p.get(), on_done=on_login, on_error=on_fail, key="login")
+
+        login_btn = tk.Button(box, text="LOGIN", command=auth, bg="#00b894", fg="white", font=("Arial", 11, "bold"), relief=tk.FLAT, cursor="hand2")
+        login_btn.pack(fill="x", pady=10)
 
     def init_dashboard(self):
-        # Create all pages
-        for F in (StorePage, CartPage, CheckoutPage, ReceiptPage):
-            page_name = F.__name__
-            frame = F(parent=self.container, controller=self)
-            self.frames[page_name] = frame
-            frame.grid(row=0, column=0, sticky="nsew")
-        
+        # Pages are built on their first show_frame
         self.show_frame("StorePage")
         
         # Admin Menu Bar
         if self.active_user['role'] == 'Manager':
             menubar = tk.Menu(self)
             admin_menu = tk.Menu(menubar, tearoff=0)
-            admin_menu.add_command(label="Inventory Manager", command=lambda: InventoryWindow(self, self.db))
-            admin_menu.add_command(label="Client Manager", command=lambda: ClientWindow(self, self.db))
+            for label in ("Inventory Manager", "Client Manager", "Sales Report"):
+                admin_menu.add_command(label=label, command=lambda l=label: self.open_admin(l))
+            admin_menu.add_command(label="Sync Offline Sales", command=self.sync_offline)
+            admin_menu.add_command(label="Metrics", command=lambda: self.open_admin("Metrics"))
             admin_menu.add_separator()
             admin_menu.add_command(label="Logout", command=self.logout)
             menubar.add_cascade(label="Admin", menu=admin_menu)
             self.config(menu=menubar)
 
+    def page(self, page_name):
+        frame = self.frames.get(page_name)
+        if frame is None:
+            with metrics.timer(f"ui.build.{page_name}"):
+                cls = getattr(importlib.import_module(PAGES[page_name]), page_name)
+                frame = self.frames[page_name] = cls(parent=self.container, controller=self)
+                frame.grid(row=0, column=0, sticky="nsew")
+                if page_name == "StorePage":
+                    frame.bind("<<CataloguePainted>>", self.on_first_paint)
+        return frame
+
+    def open_admin(self, label):
+        module, name, takes_db = ADMIN[label]
+        try:
+            cls = getattr(importlib.import_module(module), name)
+        except ImportError as e:
+            messagebox.showerror(label, f"{label} is not available: {e}")
+            return
+        return cls(self, self.db) if takes_db else cls(self)
+
     def show_frame(self, page_name):
-        frame = self.frames[page_name]
-        frame.tkraise()
-        if hasattr(frame, 'refresh'):
-            frame.refresh()
+        with metrics.timer(f"ui.show_frame.{page_name}"):
+            frame = self.page(page_name)
+            frame.tkraise()
+            if hasattr(frame, 'refresh'):
+                frame.refresh()
+
+    def watch_journal(self):
+        # Replayed sales that no longer fit the stock need a human decision
+        new = [c for c in self.db.journal.conflicts() if c['ref'] not in self.seen_conflicts]
+        if new and self.active_user and self.active_user['role'] == 'Manager':
+            self.seen_conflicts.update(c['ref'] for c in new)
+            lines = "\n".join(f"{c['ref']}: {c.get('reason')}" for c in new)
+            messagebox.showwarning("Offline Sales Conflict", f"These offline sales could not be synced:\n{lines}")
+        self.after(5000, self.watch_journal)
+
+    def watch_inventory(self):
+        # One version probe per tick; changed rows are only fetched when there are any
+        if self.active_user and "StorePage" in self.frames:
+            self.worker.submit(self.db.poll_inventory, on_done=self.on_inventory_changes,
+                               on_error=lambda e: metrics.error("poll_inventory", e), key="inventory-poll")
+        self.after(INVENTORY_POLL_MS, self.watch_inventory)
+
+    def on_inventory_changes(self, changes):
+        store = self.frames.get("StorePage") # gone if staff logged out meanwhile
+        if store is not None: store.apply_changes(changes)
+
+    def sync_offline(self):
+        def done(n):
+            j = self.db.journal
+            messagebox.showinfo("Offline Sales", f"Synced {n} sale(s). Pending: {len(j.pending())}, conflicts: {len(j.conflicts())}")
+        self.worker.submit(self.replayer.replay_once, on_done=done, key="journal-sync")
 
     def logout(self):
         self.active_user = None
-        self.cart = {}
+        self.cart.clear()
         self.config(menu=None) # clear menu
         self.render_login()
 
 if __name__ == "__main__":
     app = SmartFitLauncher()
     app.mainloop()
+    app.replayer.stop()
+    if not app.clock.reported: app.clock.report()
+    logging.getLogger("smartfit").info("%s", app.worker.report()) # the figures are also in the db_worker metrics source
+    metrics.dump(load_metrics_config()['dump_path'])
@@ -0,0 +1,89 @@
+"""
+Size charts and the per-size stock ledger (inventory_sizes).
+
+Stock is held per (sku, size); inventory.qty_in_stock is only the total as
+of the last admin write and is not touched by checkout. Rows read through
+SmartFitDB carry `sizes` ({size: qty}, chart order) and a `qty_in_stock`
+recomputed from them.
+"""
+SIZE_CHARTS = {"Shoes": ("36", "38", "40", "42")}
+DEFAULT_SIZES = ("M", "L", "XL") # Uppers, Lowers
+BATCH = 1000
+
+
+def sizes_for(category):
+    return list(SIZE_CHARTS.get(category, DEFAULT_SIZES))
+
+
+def spread(qty, sizes):
+    """Split a total over `sizes` as evenly as possible (earlier sizes take the remainder)."""
+    base, extra = divmod(max(0, int(qty)), len(sizes))
+    return {s: base + (i < extra) for i, s in enumerate(sizes)}
+
+
+def ordered(category, stock):
+    """{size: qty} in size-chart order; sizes outside the chart go last."""
+    chart = sizes_for(category)
+    out = {s: stock[s] for s in chart if s in stock}
+    out.update((s, q) for s, q in sorted(stock.items()) if s not in out)
+    return out
+
+
+def parse_sizes(text):
+    """'M:3 L:5, XL:0' -> {'M': 3, 'L': 5, 'XL': 0}; raises ValueError."""
+    out = {}
+    for part in text.replace(",", " ").replace(";", " ").split():
+        size, sep, qty = part.partition(":")
+        if not sep or not size or not qty.strip().isdigit():
+            raise ValueError(f"bad size entry {part!r} (expected SIZE:QTY)")
+        if len(size) > 10: raise ValueError(f"size {size!r} longer than 10 characters")
+        out[size] = int(qty)
+    return out
+
+
+def format_sizes(stock, sep=" "):
+    return sep.join(f"{s}:{q}" for s, q in stock.items())
+
+
+def resolve(current, qty, category):
+    """
+    Ledger to write when only a total is given: None keeps `current`
+    ({size: qty}) while it still adds up to `qty` and fits the category's
+    chart, otherwise `qty` is spread over the chart.
+    """
+    chart = sizes_for(category)
+    if current is not None and sum(current.values()) == int(qty) and sorted(current) == sorted(chart):
+        return None
+    return spread(qty, chart)
+
+
+def read(cur, skus):
+    """{sku: {size: qty}} for the given SKUs (SKUs without rows are left out)."""
+    out = {}
+    if not skus: return out
+    cur.execute(f"SELECT sku, size, qty FROM inventory_sizes WHERE sku IN ({', '.join(['%s'] * len(skus))})", list(skus))
+    for r in cur.fetchall():
+        sku, size, qty = r.values() if isinstance(r, dict) else r
+        out.setdefault(sku, {})[size] = qty
+    return out
+
+
+def write(cur, stock, batch=BATCH):
+    """Replace the ledger rows of every SKU in {sku: {size: qty}}."""
+    skus = list(stock)
+    for i in range(0, len(skus), batch):
+        part = skus[i:i + batch]
+        cur.execute(f"DELETE FROM inventory_sizes WHERE sku IN ({', '.join(['%s'] * len(part))})", part)
+        rows = [(sku, size, qty) for sku in part for size, qty in stock[sku].items()]
+        if rows:
+            cur.execute("INSERT INTO inventory_sizes (sku, size, qty) VALUES " + ", ".join(["(%s, %s, %s)"] * len(rows)),
+                        [v for row in rows for v in row])
+
+
+def backfill(cur, after_sku=0):
+    """Give products above `after_sku` that have no ledger rows their chart's sizes, splitting qty_in_stock."""
+    cur.execute("SELECT i.sku, i.category, i.qty_in_stock FROM inventory i WHERE i.sku > %s "
+                "AND NOT EXISTS (SELECT 1 FROM inventory_sizes z WHERE z.sku = i.sku)", (after_sku,))
+    rows = [tuple(r.values()) if isinstance(r, dict) else r for r in cur.fetchall()]
+    write(cur, {sku: spread(qty, sizes_for(cat)) for sku, cat, qty in rows})
+    return len(rows)
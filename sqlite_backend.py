@@ -0,0 +1,179 @@
+"""
+Embedded SQLite backend.
+
+SQLiteDB implements the full SmartFitDB surface on a single database file,
+for dev boxes, tests, demo tills and small single-till stores. The schema
+is derived from install_db.DDL_STATEMENTS and seeded with the same data.
+
+Select it in smartfit.ini ([database] backend = sqlite) or with
+SMARTFIT_DB=sqlite; SMARTFIT_SQLITE_PATH sets the file (default smartfit.db).
+"""
+import datetime
+import re
+import sqlite3
+from decimal import Decimal
+from functools import lru_cache
+
+from db_manager import SmartFitDB, Error
+
+CENTS = Decimal("0.01")
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",    # readers never block the writer
+    "PRAGMA synchronous = NORMAL",  # fsync at checkpoints only; safe with WAL
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -32000",   # 32 MB page cache
+    "PRAGMA mmap_size = 268435456",
+)
+
+# MySQL DECIMAL/DATETIME come back as Decimal/datetime; match that here
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter("DECIMAL", lambda b: Decimal(b.decode()).quantize(CENTS))
+sqlite3.register_converter("DATETIME", lambda b: datetime.datetime.fromisoformat(b.decode()))
+sqlite3.register_converter("DATE", lambda b: datetime.date.fromisoformat(b.decode()))
+
+
+@lru_cache(maxsize=512)
+def translate(sql):
+    """MySQL-flavoured statement -> SQLite: %s placeholders, no row-lock hints."""
+    sql = sql.replace("%s", "?")
+    return re.sub(r"\s+FOR UPDATE\b", "", sql)
+
+
+def sqlite_ddl(mysql_ddl):
+    """Translate one install_db CREATE TABLE into SQLite statements (table + its indexes)."""
+    table = re.search(r"CREATE TABLE IF NOT EXISTS (\w+)", mysql_ddl).group(1)
+    extra = []
+
+    def index(m):
+        kind, name, cols = m.group(1), m.group(2), m.group(3)
+        if kind == "UNIQUE KEY":
+            extra.append(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table} ({cols})")
+        elif kind == "INDEX":
+            extra.append(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({cols})")
+        return "" # FULLTEXT: search falls back to LIKE on SQLite
+
+    sql = re.sub(r",\s*(UNIQUE KEY|FULLTEXT INDEX|INDEX) (\w+) \(([^)]*)\)", index, mysql_ddl)
+    sql = sql.replace("INT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT")
+    sql = re.sub(r"\s*ENGINE=\w+", "", sql)
+    return [sql] + extra
+
+
+def _dict_row(cur, row):
+    return {d[0]: v for d, v in zip(cur.description, row)}
+
+
+class SQLiteCursor:
+    """Minimal mysql.connector-style cursor over sqlite3."""
+
+    def __init__(self, cur, dictionary=False):
+        self._cur = cur
+        if dictionary:
+            cur.row_factory = _dict_row
+
+    def execute(self, sql, params=()):
+        try:
+            self._cur.execute(translate(sql), tuple(params))
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+
+    def executemany(self, sql, seq):
+        try:
+            self._cur.executemany(translate(sql), [tuple(p) for p in seq])
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+
+    def fetchone(self): return self._cur.fetchone()
+    def fetchall(self): return self._cur.fetchall()
+    def fetchmany(self, size=1): return self._cur.fetchmany(size)
+
+    @property
+    def lastrowid(self): return self._cur.lastrowid
+
+    @property
+    def rowcount(self): return self._cur.rowcount
+
+    def close(self): self._cur.close()
+
+
+class SQLiteConnection:
+    """
+    Wraps sqlite3.Connection with the bits of the mysql.connector API that
+    SmartFitDB uses. Like mysql.connector, writes open a transaction
+    implicitly and stay uncommitted until commit().
+    """
+
+    def __init__(self, path):
+        # IMMEDIATE: take the write lock at BEGIN rather than on first write, so
+        # concurrent checkouts queue on busy_timeout instead of deadlocking
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level="IMMEDIATE",
+                                     detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        for pragma in PRAGMAS:
+            self._conn.execute(pragma)
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def start_transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self._conn.cursor(), dictionary)
+
+    def commit(self): self._conn.commit()
+    def rollback(self): self._conn.rollback()
+    def ping(self, **kwargs): pass
+    def is_connected(self): return True
+    def close(self): self._conn.close()
+
+
+def init_sqlite(path, reset=False):
+    """Bring the schema up to date (dropping it first if reset) and seed demo data into an empty database."""
+    from install_db import TABLES, seed_if_empty
+    from migrations import migrate
+
+    conn = SQLiteConnection(path)
+    cur = conn.cursor()
+    try:
+        if reset:
+            cur.execute("PRAGMA foreign_keys = OFF")
+            for table in TABLES:
+                cur.execute(f"DROP TABLE IF EXISTS {table}")
+            cur.execute("PRAGMA foreign_keys = ON")
+        migrate(conn, "sqlite", log=lambda msg: None)
+        seed_if_empty(cur)
+        conn.commit()
+    finally:
+        cur.close(); conn.close()
+
+
+class SQLiteDB(SmartFitDB):
+    CONNECTION_ERRORS = ()
+    DIALECT = "sqlite"
+
+    def __init__(self, path="smartfit.db", **kwargs):
+        self.path = path
+        init_sqlite(path) # creates a new file, or applies any pending migrations to an existing one
+        super().__init__(**kwargs)
+        self.config = {'database': path}
+
+    def _connect(self):
+        return SQLiteConnection(self.path)
+
+    def _next_inventory_version(self, cur):
+        # No LAST_INSERT_ID(expr) in SQLite; the write lock is already held so this is race-free
+        cur.execute("UPDATE inventory_version SET version = version + 1 WHERE id = 1 RETURNING version")
+        row = cur.fetchone()
+        if row is None: return 0
+        return row['version'] if isinstance(row, dict) else row[0]
+
+    def _text_match(self, words):
+        # No FULLTEXT: every word must appear in name, category or details
+        clause = " AND ".join(["(item_name LIKE %s OR category LIKE %s OR details LIKE %s)"] * len(words))
+        return f"({clause})", [f"%{w}%" for w in words for _ in range(3)]
+
+    def _upsert_clause(self, key, cols=(), add=()):
+        sets = [f"{c} = excluded.{c}" for c in cols] + [f"{c} = {c} + excluded.{c}" for c in add]
+        return f" ON CONFLICT({key}) DO UPDATE SET " + ", ".join(sets)
@@ -1,8 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image, ImageTk
 import os
-import datetime
+from instrumentation import timed
+from client_picker import ClientPicker
+from receipts import format_receipt
+from sizes import format_sizes
+from thumbnails import ThumbnailLoader
+from virtual_grid import VirtualGrid
 
 # --- COLORS ---
 BG_DARK = "#2d3436"
@@ -10,12 +14,97 @@ BG_LIGHT = "#dfe6e9"
 ACCENT = "#00b894" # Mint Green
 TEXT_COLOR = "#2d3436"
 
+# --- PRODUCT CARD ---
+class ProductCard(tk.Frame):
+    """
+    One catalogue tile. Cards are built once per SKU and kept alive;
+    show() rebinds the card to a fresh inventory row and only touches the
+    widgets whose data actually changed.
+    """
+    def __init__(self, parent, page):
+        super().__init__(parent, bg="white", padx=5, pady=5)
+        self.page = page
+        self.item = None
+        self.state = None
+        self.slot = None
+        self.photo = None
+
+        self.img_lbl = tk.Label(self, text="No Image", bg="#eee", height=8, width=18)
+        self.img_lbl.pack(pady=5)
+        self.name_lbl = tk.Label(self, font=("Helvetica", 11, "bold"), bg="white", fg="#2d3436", wraplength=140)
+        self.name_lbl.pack()
+        self.price_lbl = tk.Label(self, font=("Arial", 10), fg=ACCENT, bg="white")
+        self.price_lbl.pack()
+        self.stock_lbl = tk.Label(self, font=("Arial", 8), fg="gray", bg="white")
+        self.stock_lbl.pack()
+
+        self.size_var = tk.StringVar()
+        self.size_cb = ttk.Combobox(self, textvariable=self.size_var, state="readonly", width=5)
+        self.add_btn = tk.Button(self, text="ADD +", bg=BG_DARK, fg="white", relief=tk.FLAT,
+                                 command=lambda: self.page.add_to_cart(self.item, self.size_var.get()))
+        self.sold_lbl = tk.Label(self, text="SOLD OUT", fg="red", bg="white")
+
+    def show(self, item):
+        if self.item is not None and self.item['sku'] != item['sku']:
+            self.size_var.set("") # recycled onto another product
+        self.item = item
+        state = (item['item_name'], item['unit_price'], tuple(item['sizes'].items()), item.get('image_path') or '')
+        if state == self.state: return False
+        name, price, stock, path = state
+        old = self.state or (None,) * len(state)
+
+        if name != old[0]: self.name_lbl.config(text=name)
+        if price != old[1]: self.price_lbl.config(text=f"${price}")
+        if path != old[3]: self.set_image(path)
+        if stock != old[2]:
+            # Only sizes that are actually on the shelf can be picked
+            available = [size for size, qty in stock if qty > 0]
+            self.stock_lbl.config(text=format_sizes(dict(stock)))
+            self.size_cb.pack_forget(); self.add_btn.pack_forget(); self.sold_lbl.pack_forget()
+            if available:
+                self.size_cb.config(values=available)
+                if self.size_var.get() not in available: self.size_var.set(available[0])
+                self.size_cb.pack(pady=2)
+                self.add_btn.pack(fill="x", pady=(5,0))
+            else:
+                self.sold_lbl.pack(pady=5)
+        self.state = state
+        return True
+
+    def set_image(self, path):
+        self.photo = None
+        if path and os.path.exists(path):
+            photo = self.page.thumbs.request(path, lambda p, want=path: self.on_thumb(want, p))
+            if photo is not None: self.show_photo(photo)
+            else: self.img_lbl.config(image="", text="Loading...", bg="#eee", width=18, height=8)
+        else:
+            self.img_lbl.config(image="", text="No Image", bg="#eee", width=18, height=8)
+
+    def on_thumb(self, path, photo):
+        if not self.winfo_exists() or not self.state or self.state[3] != path: return # card was rebound meanwhile
+        if photo is not None: self.show_photo(photo)
+        else: self.img_lbl.config(image="", text="[Img]", bg="#eee", width=18, height=8)
+
+    def show_photo(self, photo):
+        self.photo = photo
+        self.img_lbl.config(image=photo, text="", bg="white", width=0, height=0)
+
+
 # --- PAGE 1: STORE GRID ---
 class StorePage(tk.Frame):
+    COLS = 5
+    # Above this many matching items the grid switches to virtualized mode,
+    # which only builds the cards around the viewport and recycles them.
+    VIRTUAL_MIN_ITEMS = 300
+    CELL_W, CELL_H = 180, 300
+    SEARCH_PAGE = 60
+    SEARCH_DELAY_MS = 250 # debounce for search-as-you-type
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.image_refs = {} 
+        self.cards = {} # sku -> ProductCard
+        self.thumbs = ThumbnailLoader(self)
 
         # Header
         header = tk.Frame(self, bg=BG_DARK, height=80, padx=20)
@@ -26,6 +115,10 @@ class StorePage(tk.Frame):
         search_frm = tk.Frame(header, bg=BG_DARK)
         search_frm.pack(side="left", padx=40)
         self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *a: self.schedule_search())
+        self.search_job = None
+        self.next_page = None
+        self.listing = []
         entry = tk.Entry(search_frm, textvariable=self.search_var, width=30, bg="white", fg="black", font=("Arial", 12))
         entry.pack(side="left", ipady=5)
         tk.Button(search_frm, text="🔍", command=self.refresh, bg=ACCENT, fg="white", relief=tk.FLAT, font=("Arial", 10)).pack(side="left", padx=5)
@@ -40,87 +133,156 @@ class StorePage(tk.Frame):
         self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
         self.scroll_frame = tk.Frame(self.canvas, bg=BG_LIGHT)
         
-        self.scroll_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
-        self.canvas.create_window((0, 0), window=self.scroll_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.scroll_frame.bind("<Configure>", lambda e: self.virtual or self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+        self.frame_win = self.canvas.create_window((0, 0), window=self.scroll_frame, anchor="nw")
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        self.canvas.bind("<Configure>", lambda e: self.virtual and self.vgrid.update_view())
+
+        self.virtual = False
+        self.vgrid = VirtualGrid(self.canvas, lambda parent: ProductCard(parent, self), ProductCard.show,
+                                 self.CELL_W, self.CELL_H, self.COLS)
         
         self.canvas.pack(side="left", fill="both", expand=True, padx=0, pady=0)
         self.scrollbar.pack(side="right", fill="y")
         
         # Toast Notification
         self.toast = tk.Label(self, text="", bg=ACCENT, fg="white", padx=15, pady=8, font=("Arial", 10, "bold"))
+        self.loading_lbl = tk.Label(self, text="Loading...", bg=BG_DARK, fg="white", padx=15, pady=8, font=("Arial", 10, "bold"))
 
+    @timed("ui.StorePage.refresh")
     def refresh(self):
-        qty_total = sum(self.controller.cart.values())
-        self.cart_btn.config(text=f"View Cart ({qty_total})")
-
-        for w in self.scroll_frame.winfo_children(): w.destroy()
-        self.image_refs = {}
-
-        items = self.controller.db.fetch_inventory()
-        query = self.search_var.get().lower()
-        
-        filtered = [i for i in items if query in i['item_name'].lower()]
-        
-        cols = 5 
-        for idx, item in enumerate(filtered):
-            r, c = divmod(idx, cols)
-            self.create_card(item, r, c)
-
-    def create_card(self, item, r, c):
-        f = tk.Frame(self.scroll_frame, bg="white", padx=5, pady=5)
-        f.grid(row=r, column=c, padx=10, pady=10, sticky="news")
-        
-        # Image
-        path = item.get('image_path', '')
-        if path and os.path.exists(path):
-            try:
-                pil_img = Image.open(path).resize((140, 140))
-                tk_img = ImageTk.PhotoImage(pil_img)
-                self.image_refs[item['sku']] = tk_img
-                tk.Label(f, image=tk_img, bg="white").pack(pady=5)
-            except: tk.Label(f, text="[Img]", bg="#eee", height=8, width=18).pack(pady=5)
+        self.update_cart_badge()
+        db = self.controller.db
+
+        query = self.search_var.get().strip()
+        self.next_page = None
+        if query:
+            # Server-side search, one page at a time
+            self.load(lambda res: self.on_page(res, []), db.search_inventory, query, limit=self.SEARCH_PAGE)
+        elif db.inventory_cache.is_fresh():
+            self.cancel_load()
+            items = db.fetch_inventory() # answered from memory, no need for a round trip
+            self.show_items(items, {i['sku'] for i in items})
         else:
-            tk.Label(f, text="No Image", bg="#eee", height=8, width=18).pack(pady=5)
-
-        tk.Label(f, text=item['item_name'], font=("Helvetica", 11, "bold"), bg="white", fg="#2d3436", wraplength=140).pack()
-        tk.Label(f, text=f"${item['unit_price']}", font=("Arial", 10), fg=ACCENT, bg="white").pack()
-        
-        stk = item['qty_in_stock']
-        if stk > 0:
-            # SIZE SELECTION LOGIC
-            cat = item['category']
-            if cat == "Shoes":
-                sizes = ["36", "38", "40", "42"]
-            else: # Uppers, Lowers
-                sizes = ["M", "L", "XL"]
-            
-            size_var = tk.StringVar(value=sizes[0])
-            size_cb = ttk.Combobox(f, textvariable=size_var, values=sizes, state="readonly", width=5)
-            size_cb.pack(pady=2)
+            self.load(lambda items: self.show_items(items, {i['sku'] for i in items}), db.fetch_inventory)
+
+    def load(self, on_done, fn, *args, **kwargs):
+        # One "listing" request at a time: a newer search or refresh cancels the older one
+        self.loading_lbl.place(relx=0.5, rely=0.5, anchor="center")
+        def done(result):
+            self.loading_lbl.place_forget()
+            on_done(result)
+        def failed(err):
+            self.loading_lbl.place_forget()
+            self.show_toast(f"Could not load products: {err}")
+        self.controller.worker.submit(fn, *args, on_done=done, on_error=failed, key="store-listing", **kwargs)
+
+    def cancel_load(self):
+        self.controller.worker.cancel("store-listing")
+        self.loading_lbl.place_forget()
+
+    def on_page(self, result, shown):
+        rows, self.next_page = result
+        self.show_items(shown + rows)
+
+    def schedule_search(self):
+        if self.search_job: self.after_cancel(self.search_job)
+        self.search_job = self.after(self.SEARCH_DELAY_MS, self.run_search)
+
+    def run_search(self):
+        self.search_job = None
+        self.canvas.yview_moveto(0)
+        self.refresh()
 
-            tk.Button(f, text="ADD +", bg=BG_DARK, fg="white", relief=tk.FLAT,
-                      command=lambda s=size_var: self.add_to_cart(item, s.get())).pack(fill="x", pady=(5,0))
+    def load_more(self, page):
+        shown = self.listing
+        self.load(lambda res: self.on_page(res, shown), self.controller.db.search_inventory,
+                  self.search_var.get().strip(), limit=self.SEARCH_PAGE, after=page)
+
+    @timed("ui.StorePage.render")
+    def show_items(self, items, live_skus=None):
+        self.listing = items
+        self.set_virtual(len(items) >= self.VIRTUAL_MIN_ITEMS)
+        if self.virtual:
+            self.vgrid.set_items(items)
+        else:
+            self.render_grid(items, live_skus)
+        self.event_generate("<<CataloguePainted>>")
+
+    def apply_changes(self, changes):
+        """Fold a poll_inventory() result into the grid (None = the catalogue was reloaded)."""
+        if changes is not None and not any(changes): return
+        cache = self.controller.db.inventory_cache
+        if self.search_var.get().strip():
+            # Search page: refresh the rows already listed, in their order
+            rows = [cache.get(r['sku']) for r in self.listing]
+            self.show_items([r for r in rows if r is not None])
         else:
-            tk.Label(f, text="SOLD OUT", fg="red", bg="white").pack(pady=5)
+            items = cache.rows()
+            self.show_items(items, {i['sku'] for i in items})
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.virtual: self.vgrid.update_view()
+        if self.next_page and float(last) >= 0.98:
+            # Reached the bottom of a search page; claim the cursor so it is fetched once
+            page, self.next_page = self.next_page, None
+            self.load_more(page)
+
+    def set_virtual(self, virtual):
+        if virtual == self.virtual: return
+        self.virtual = virtual
+        self.canvas.yview_moveto(0)
+        if virtual:
+            for card in self.cards.values(): card.destroy()
+            self.cards = {}
+            self.canvas.coords(self.frame_win, -100000, -100000) # park the frame grid off-canvas
+        else:
+            self.vgrid.clear()
+            self.canvas.coords(self.frame_win, 0, 0)
+
+    def update_cart_badge(self):
+        qty_total = self.controller.cart.units
+        self.cart_btn.config(text=f"View Cart ({qty_total})")
+
+    def render_grid(self, items, live_skus=None):
+        """
+        Diff the grid against `items`: reuse cards, move only those whose slot
+        changed. Cards not in `live_skus` (the full catalogue) are destroyed;
+        pass None for partial listings such as search pages.
+        """
+        shown = set()
+        for idx, item in enumerate(items):
+            sku = item['sku']
+            card = self.cards.get(sku)
+            if card is None:
+                card = self.cards[sku] = ProductCard(self.scroll_frame, self)
+            card.show(item)
+
+            slot = divmod(idx, self.COLS)
+            if card.slot != slot:
+                card.grid(row=slot[0], column=slot[1], padx=10, pady=10, sticky="news")
+                card.slot = slot
+            shown.add(sku)
+
+        for sku, card in list(self.cards.items()):
+            if sku in shown: continue
+            if live_skus is not None and sku not in live_skus: # deleted from inventory
+                card.destroy()
+                del self.cards[sku]
+            elif card.slot is not None: # filtered out by search
+                card.grid_remove()
+                card.slot = None
 
     def add_to_cart(self, item, size):
-        sku = item['sku']
-        # Composite Key for Cart: "SKU_SIZE"
-        cart_key = f"{sku}_{size}"
-        
-        # Calculate total stock usage for this SKU across all sizes
-        current_stock_usage = 0
-        for k, v in self.controller.cart.items():
-            if str(k).startswith(f"{sku}_") or str(k) == str(sku):
-                current_stock_usage += v
-        
-        if current_stock_usage < item['qty_in_stock']:
-            self.controller.cart[cart_key] = self.controller.cart.get(cart_key, 0) + 1
-            self.refresh()
+        cart = self.controller.cart
+        # Stock is per size: this size's shelf quantity bounds what the cart may hold
+        if cart.qty(item['sku'], size) < item['sizes'].get(size, 0):
+            cart.add(item['sku'], size, 1, item['unit_price'])
+            self.update_cart_badge()
             self.show_toast(f"Added {item['item_name']} ({size})")
         else:
-            messagebox.showwarning("Stock", "Max available stock reached for this item")
+            messagebox.showwarning("Stock", f"Max available stock reached for size {size}")
 
     def show_toast(self, msg):
         self.toast.config(text=msg)
@@ -146,15 +308,25 @@ class CartPage(tk.Frame):
         tk.Button(btns, text="Secure Checkout", bg=ACCENT, fg="white", font=("bold"), relief=tk.FLAT, padx=20, pady=10,
                   command=lambda: controller.show_frame("CheckoutPage")).pack(side="left", padx=10)
 
+    @timed("ui.CartPage.refresh")
     def refresh(self):
         for w in self.list_frame.winfo_children(): w.destroy()
-        
+        self.rows = {} # (sku, size) -> (row frame, qty label, line total label)
+
         cart = self.controller.cart
         if not cart:
             tk.Label(self.list_frame, text="Your bag is empty.", bg="white", font=("Arial", 14)).pack(pady=50)
             return
 
-        inventory = {i['sku']: i for i in self.controller.db.fetch_inventory()}
+        loading = tk.Label(self.list_frame, text="Loading...", bg="white", fg="gray", font=("Arial", 14))
+        loading.pack(pady=50)
+        self.controller.worker.submit(self.controller.db.fetch_inventory, key="cart",
+                                      on_done=lambda items: (loading.destroy(), self.render({i['sku']: i for i in items})),
+                                      on_error=lambda err: loading.config(text=f"Could not load your bag: {err}", fg="red"))
+
+    @timed("ui.CartPage.render")
+    def render(self, inventory):
+        cart = self.controller.cart
         
         h_frm = tk.Frame(self.list_frame, bg="#f1f2f6")
         h_frm.pack(fill="x")
@@ -163,20 +335,11 @@ class CartPage(tk.Frame):
         for h, w in zip(headers, widths):
             tk.Label(h_frm, text=h, bg="#f1f2f6", font=("Arial", 10, "bold"), width=w, anchor="w").pack(side="left", padx=5, pady=10)
 
-        total = 0
-        for key, qty in cart.items():
-            # Parse Key
-            if "_" in str(key):
-                sku_str, size = str(key).split("_", 1)
-                sku = int(sku_str)
-            else:
-                sku = int(key); size="-"
-
-            if sku not in inventory: continue
-            item = inventory[sku]
-            price = float(item['unit_price'])
-            line_tot = price * qty
-            total += line_tot
+        for sku, size, qty in list(cart):
+            item = inventory.get(sku)
+            if item is None: continue
+            cart.reprice(sku, item['unit_price']) # keep the cached subtotal on current prices
+            price = cart.price(sku)
             
             row = tk.Frame(self.list_frame, bg="white", borderwidth=0)
             row.pack(fill="x", pady=2)
@@ -187,35 +350,45 @@ class CartPage(tk.Frame):
             
             q_frm = tk.Frame(row, bg="white", width=15)
             q_frm.pack(side="left", padx=5)
-            tk.Button(q_frm, text="-", command=lambda k=key: self.mod_qty(k, -1)).pack(side="left")
-            tk.Label(q_frm, text=qty, bg="white", width=3).pack(side="left")
-            # For adding, we need to check overall stock again
-            tk.Button(q_frm, text="+", command=lambda k=key, s=sku, m=item['qty_in_stock']: self.mod_qty(k, 1, m, s)).pack(side="left")
+            tk.Button(q_frm, text="-", command=lambda k=(sku, size): self.mod_qty(k, -1)).pack(side="left")
+            qty_lbl = tk.Label(q_frm, text=qty, bg="white", width=3)
+            qty_lbl.pack(side="left")
+            # For adding, check this size's stock again
+            tk.Button(q_frm, text="+", command=lambda k=(sku, size), m=item['sizes'].get(size, 0): self.mod_qty(k, 1, m)).pack(side="left")
             
-            tk.Label(row, text=f"${line_tot:.2f}", bg="white", width=15, anchor="w").pack(side="left", padx=20)
-            tk.Button(row, text="×", bg="white", fg="red", relief=tk.FLAT, command=lambda k=key: self.mod_qty(k, -999)).pack(side="left")
+            tot_lbl = tk.Label(row, text=f"${cart.line_total(sku, size):.2f}", bg="white", width=15, anchor="w")
+            tot_lbl.pack(side="left", padx=20)
+            tk.Button(row, text="×", bg="white", fg="red", relief=tk.FLAT, command=lambda k=(sku, size): self.mod_qty(k, -999)).pack(side="left")
+            self.rows[(sku, size)] = (row, qty_lbl, tot_lbl)
 
-        tk.Label(self.list_frame, text=f"Total: ${total:.2f}", font=("Arial", 18, "bold"), bg="white", fg=ACCENT).pack(pady=20, anchor="e", padx=50)
+        self.lbl_total = tk.Label(self.list_frame, text=f"Total: ${cart.subtotal:.2f}", font=("Arial", 18, "bold"), bg="white", fg=ACCENT)
+        self.lbl_total.pack(pady=20, anchor="e", padx=50)
 
-    def mod_qty(self, key, delta, max_s=100, sku=None):
-        curr = self.controller.cart.get(key, 0)
-        new_q = curr + delta
+    def mod_qty(self, key, delta, max_s=100):
+        cart = self.controller.cart
+        sku, size = key
+        new_q = cart.qty(sku, size) + delta
         
-        if delta > 0 and sku:
-            # Check overall stock usage for this SKU
-            usage = 0
-            for k, v in self.controller.cart.items():
-                if str(k).startswith(f"{sku}_") or str(k) == str(sku):
-                    usage += v
-            if usage + delta > max_s:
-                messagebox.showwarning("Stock", "Limit reached")
-                return
+        # Check stock for this size
+        if delta > 0 and new_q > max_s:
+            messagebox.showwarning("Stock", "Limit reached")
+            return
 
         if delta == -999 or new_q <= 0:
-            del self.controller.cart[key]
+            cart.remove(sku, size)
         else:
-            self.controller.cart[key] = new_q
-        self.refresh()
+            cart.set_qty(sku, size, new_q)
+
+        # Patch just this line and the total instead of rebuilding the list
+        if not cart: return self.refresh()
+        row, qty_lbl, tot_lbl = self.rows[key]
+        if cart.qty(sku, size):
+            qty_lbl.config(text=cart.qty(sku, size))
+            tot_lbl.config(text=f"${cart.line_total(sku, size):.2f}")
+        else:
+            row.destroy()
+            del self.rows[key]
+        self.lbl_total.config(text=f"Total: ${cart.subtotal:.2f}")
 
 
 # --- PAGE 3: CHECKOUT ---
@@ -224,7 +397,8 @@ class CheckoutPage(tk.Frame):
         super().__init__(parent)
         self.controller = controller
         self.configure(bg="#f5f6fa")
-        self.voucher_active = False 
+        self.voucher = None # applied voucher code
+        self.snapshot = {}  # {sku: row} used for pricing previews
         
         tk.Label(self, text="Checkout", font=("Helvetica", 22), bg="#f5f6fa", fg=BG_DARK).pack(pady=15, anchor="w", padx=40)
         
@@ -240,10 +414,8 @@ class CheckoutPage(tk.Frame):
         cust_frm = tk.Frame(left_panel, bg="white", padx=15, pady=15, relief=tk.FLAT)
         cust_frm.pack(fill="x", pady=(0, 20))
         
-        self.c_var = tk.StringVar()
-        self.c_box = ttk.Combobox(cust_frm, textvariable=self.c_var, state="readonly", font=("Arial", 11))
-        self.c_box.pack(fill="x", pady=5)
-        self.c_box.bind("<<ComboboxSelected>>", self.on_cust_select)
+        self.picker = ClientPicker(cust_frm, controller, self.on_cust_select, bg="white")
+        self.picker.pack(fill="x")
         
         self.lbl_cust_info = tk.Label(cust_frm, text="No customer selected", bg="white", fg="gray")
         self.lbl_cust_info.pack(anchor="w")
@@ -287,68 +459,64 @@ class CheckoutPage(tk.Frame):
         self.lbl_tot = tk.Label(right_panel, text="$0.00", font=("Arial", 24, "bold"), bg="white", fg=BG_DARK)
         self.lbl_tot.pack(pady=10)
         
-        tk.Button(right_panel, text="CONFIRM ORDER", bg=ACCENT, fg="white", font=("Arial", 12, "bold"), relief=tk.FLAT, height=2, command=self.process).pack(fill="x", pady=20)
+        self.confirm_btn = tk.Button(right_panel, text="CONFIRM ORDER", bg=ACCENT, fg="white", font=("Arial", 12, "bold"), relief=tk.FLAT, height=2, command=self.process)
+        self.confirm_btn.pack(fill="x", pady=20)
         
         tk.Button(right_panel, text="Cancel", bg="white", fg="red", relief=tk.FLAT, command=lambda: controller.show_frame("CartPage")).pack()
 
+    @timed("ui.CheckoutPage.refresh")
     def refresh(self):
-        self.voucher_active = False 
+        self.voucher = None
         self.v_var.set("")
-        self.clients = self.controller.db.fetch_clients()
-        self.c_box['values'] = [f"{c['client_id']} - {c['full_name']}" for c in self.clients]
-        if self.c_box['values']: self.c_box.current(0)
-        self.on_cust_select()
-
-    def on_cust_select(self, e=None):
-        if not self.c_box.get(): return
-        idx = self.c_box.current()
-        client = self.clients[idx]
+        db = self.controller.db
+        # Pricing rules and an inventory snapshot in one background trip, so
+        # calc_totals never touches the database on the Tk thread. Clients are
+        # looked up on demand by the picker.
+        self.controller.worker.submit(lambda: (db.pricing.rules(), db.fetch_inventory()),
+                                      on_done=self.on_loaded, on_error=self.on_load_failed, key="checkout")
+
+    def on_loaded(self, result):
+        _, items = result
+        self.snapshot = {i['sku']: i for i in items}
+        self.calc_totals()
+
+    def on_load_failed(self, err):
+        self.lbl_tot.config(text="--")
+        messagebox.showerror("Checkout", f"Could not load prices: {err}")
+
+    def on_cust_select(self, client):
         self.selected_client = client
         self.lbl_cust_info.config(text=f"Status: {client['client_type']}")
         self.calc_totals()
 
     def apply_voucher(self):
         code = self.v_var.get().strip()
-        if code == "Jhapa5":
-            if not self.voucher_active:
-                self.voucher_active = True
-                messagebox.showinfo("Voucher", "Jhapa5 Applied: 5% Discount!")
+        pct = self.controller.db.pricing.voucher_percent(code)
+        if pct is not None:
+            if self.voucher != code:
+                self.voucher = code
+                messagebox.showinfo("Voucher", f"{code} Applied: {f'{pct:.2f}'.rstrip('0').rstrip('.')}% Discount!")
                 self.calc_totals()
             else:
                 messagebox.showinfo("Info", "Voucher already active")
         else:
-            self.voucher_active = False
+            self.voucher = None
             messagebox.showerror("Error", "Invalid Code")
             self.calc_totals()
 
+    @timed("ui.CheckoutPage.calc_totals")
     def calc_totals(self):
-        inventory = {i['sku']: i for i in self.controller.db.fetch_inventory()}
-        sub = 0
-        for k, qty in self.controller.cart.items():
-            if "_" in str(k): sku = int(str(k).split("_")[0])
-            else: sku = int(k)
-            
-            if sku in inventory: sub += float(inventory[sku]['unit_price']) * qty
-        
-        disc = 0
+        # Tier / voucher / category rules live in the pricing engine
+        c_type = self.selected_client['client_type'] if hasattr(self, 'selected_client') else None
+        quote = self.controller.db.pricing.quote_one(self.controller.cart, c_type, self.voucher, self.snapshot)
         
-        # New Tiered Discount Logic
-        if hasattr(self, 'selected_client'):
-            c_type = self.selected_client['client_type']
-            if c_type == 'Gold': disc += sub * 0.15
-            elif c_type == 'Silver': disc += sub * 0.10
-            elif c_type == 'Bronze': disc += sub * 0.05
+        self.final_total = quote.total
+        self.subtotal = quote.subtotal
+        self.discount_val = quote.discount
         
-        if self.voucher_active:
-            disc += sub * 0.05
-        
-        self.final_total = sub - disc
-        self.subtotal = sub
-        self.discount_val = disc
-        
-        self.lbl_sub.config(text=f"Subtotal: ${sub:.2f}")
-        self.lbl_disc.config(text=f"Total Discounts: -${disc:.2f}")
-        self.lbl_tot.config(text=f"${self.final_total:.2f}")
+        self.lbl_sub.config(text=f"Subtotal: ${quote.subtotal:.2f}")
+        self.lbl_disc.config(text=f"Total Discounts: -${quote.discount:.2f}")
+        self.lbl_tot.config(text=f"${quote.total:.2f}")
 
     def quick_add(self):
         top = tk.Toplevel(self)
@@ -360,9 +528,17 @@ class CheckoutPage(tk.Frame):
         # Updated Dropdown
         cb = ttk.Combobox(top, values=["Regular", "Gold", "Silver", "Bronze"]); cb.current(0); cb.pack(fill="x", padx=10)
         def save():
-            self.controller.db.register_client(e1.get(), e2.get(), "N/A", cb.get())
+            name, phone, c_type = e1.get(), e2.get(), cb.get()
+            def added(res):
+                ok, cid = res
+                if not ok:
+                    messagebox.showerror("Error", cid)
+                    return
+                self.picker.select({'client_id': cid, 'full_name': name, 'contact_no': phone,
+                                    'email_addr': "N/A", 'client_type': c_type})
+            self.controller.worker.submit(self.controller.db.register_client, name, phone, "N/A", c_type, on_done=added,
+                                          on_error=lambda err: messagebox.showerror("Error", f"Could not save the client: {err}"))
             top.destroy()
-            self.refresh()
         tk.Button(top, text="Save Profile", command=save, bg=BG_DARK, fg="white").pack(pady=20)
 
     def process(self):
@@ -376,13 +552,27 @@ class CheckoutPage(tk.Frame):
         cid = self.selected_client['client_id']
         sid = self.controller.active_user['uid']
         
-        ok, oid = self.controller.db.process_transaction(
-            sid, cid, self.controller.cart, self.subtotal, self.discount_val, self.final_total, self.pay_method.get()
+        # Totals are re-priced server-side; the figures shown here are only a preview
+        self.confirm_btn.config(state="disabled", text="PROCESSING...")
+        self.controller.worker.submit(
+            self.controller.db.process_transaction,
+            sid, cid, self.controller.cart.to_payload(), self.pay_method.get(), self.voucher,
+            on_done=self.on_processed, on_error=self.on_process_failed, key="checkout-confirm"
         )
-        
+
+    def on_process_failed(self, err):
+        self.confirm_btn.config(state="normal", text="CONFIRM ORDER")
+        messagebox.showerror("Transaction Failed", str(err))
+
+    def on_processed(self, result):
+        ok, oid = result
+        self.confirm_btn.config(state="normal", text="CONFIRM ORDER")
         if ok:
             self.controller.last_order_id = oid
-            self.controller.cart = {}
+            self.controller.cart.clear()
+            del self.selected_client
+            self.picker.var.set("")
+            self.lbl_cust_info.config(text="No customer selected")
             self.controller.show_frame("ReceiptPage")
         else:
             messagebox.showerror("Transaction Failed", oid)
@@ -407,36 +597,25 @@ class ReceiptPage(tk.Frame):
     def refresh(self):
         oid = self.controller.last_order_id
         if not oid: return
+
+        self.txt.delete("1.0", tk.END)
+        self.txt.insert("1.0", "Loading receipt...")
+        self.controller.worker.submit(self.controller.db.get_order_details, oid,
+                                      on_done=lambda res: self.render(oid, *res), key="receipt",
+                                      on_error=self.on_load_failed)
+
+    def on_load_failed(self, err):
+        self.txt.delete("1.0", tk.END)
+        self.txt.insert("1.0", f"Could not load receipt #{self.controller.last_order_id}:\n{err}")
+
+    @timed("ui.ReceiptPage.render")
+    def render(self, oid, head, items):
+        if not head:
+            self.txt.delete("1.0", tk.END)
+            self.txt.insert("1.0", f"Receipt #{oid} not found.")
+            return
         
-        head, items = self.controller.db.get_order_details(oid)
-        if not head: return
-        
-        self.receipt_content = f"""
-==========================================
-           SMARTFIT POS SYSTEM
-==========================================
-Receipt ID: {oid}
-Date:       {head['sale_date']}
-Staff:      {head['staff_name']}
-Client:     {head['client_name']}
-Payment:    {head['payment_method']}
-------------------------------------------
-ITEM                QTY     PRICE
-------------------------------------------
-"""
-        for i in items:
-            name_display = f"{i['item_name']} ({i['item_size']})"
-            self.receipt_content += f"{name_display[:25]:<25} x{i['qty']:<3} ${i['sold_at_price']}\n"
-            
-        self.receipt_content += f"""------------------------------------------
-Subtotal:   ${head['subtotal']}
-Discount:  -${head['discount_amount']}
-------------------------------------------
-TOTAL:      ${head['grand_total']}
-==========================================
-Thank you for shopping!
-"""
-        
+        self.receipt_content = format_receipt(oid, head, items)
         self.txt.delete("1.0", tk.END)
         self.txt.insert("1.0", self.receipt_content)
 
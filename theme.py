@@ -0,0 +1,183 @@
+"""
+Theme assets.
+
+Gradients, translucent overlays and button state images are rendered once
+as images instead of being drawn as hundreds of canvas lines. The work is
+done by PIL in C: a 256-step ramp (Image.linear_gradient) is stretched to a
+one-pixel strip, tinted with Image.composite and scaled to the full size.
+
+PhotoImages are cached in memory by (kind, size, colours) in a ThemeCache
+bounded by decoded bytes, as every window size leaves another full-size
+gradient behind; paint_gradient() keeps a canvas filled with a single image item and only
+re-renders when the canvas is resized. A full-window gradient renders in a
+few milliseconds, quicker than decoding it from a PNG, so only assets that
+are needed as files (the legacy overlay.png) go to the disk cache.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageTk
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".theme_cache")
+RESIZE_DELAY_MS = 60 # a window drag fires many <Configure>s; render once it settles
+
+
+def hex_to_rgb(color):
+    color = color.lstrip("#")
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def _rgba(color):
+    if isinstance(color, str):
+        return hex_to_rgb(color) + (255,)
+    return tuple(color) + (255,) * (4 - len(color))
+
+
+# --- RENDERING ---
+def render_gradient(size, start, end, vertical=False):
+    """Linear gradient from `start` to `end` (left to right, or top to bottom)."""
+    w, h = max(1, size[0]), max(1, size[1])
+    length = h if vertical else w
+    ramp = Image.linear_gradient("L").resize((1, length), Image.BILINEAR) # 0 at the top, 255 at the bottom
+    strip = Image.composite(Image.new("RGB", (1, length), hex_to_rgb(end)),
+                            Image.new("RGB", (1, length), hex_to_rgb(start)), ramp)
+    if not vertical:
+        strip = strip.transpose(Image.TRANSPOSE)
+    return strip.resize((w, h), Image.NEAREST)
+
+
+def render_overlay(size, rgba=(0, 0, 0, 140), radius=0):
+    """Flat translucent panel, optionally with rounded corners."""
+    img = Image.new("RGBA", size, (0, 0, 0, 0) if radius else _rgba(rgba))
+    if radius:
+        ImageDraw.Draw(img).rounded_rectangle((0, 0, size[0] - 1, size[1] - 1), radius, fill=_rgba(rgba))
+    return img
+
+
+def render_button(size, fill, border=None, radius=6):
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
+    ImageDraw.Draw(img).rounded_rectangle((0, 0, size[0] - 1, size[1] - 1), radius, fill=_rgba(fill),
+                                          outline=_rgba(border) if border else None)
+    return img
+
+
+RENDERERS = {
+    'gradient': render_gradient,
+    'overlay': render_overlay,
+    'button': render_button,
+}
+
+
+def _size(size):
+    return max(1, int(size[0])), max(1, int(size[1]))
+
+
+def asset(kind, size, *args):
+    return RENDERERS[kind](_size(size), *args)
+
+
+# --- DISK CACHE ---
+def cache_path(kind, size, args, cache_dir=CACHE_DIR):
+    raw = f"{kind}|{size[0]}x{size[1]}|{args!r}"
+    return os.path.join(cache_dir, f"{kind}-{hashlib.sha1(raw.encode('utf-8')).hexdigest()}.png")
+
+
+def asset_file(kind, size, *args, cache_dir=CACHE_DIR):
+    """Path of the asset as a PNG, rendered on first request (for code that wants a file)."""
+    size = _size(size)
+    target = cache_path(kind, size, args, cache_dir)
+    if not os.path.exists(target):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        asset(kind, size, *args).save(tmp, "PNG")
+        os.replace(tmp, target)
+    return target
+
+
+# --- TK SIDE ---
+class ThemeCache:
+    """PhotoImages keyed by (kind, size, args), kept in an LRU of at most `max_bytes` (create after the Tk root)."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lru = OrderedDict()
+        self._bytes = 0
+        self.stats = {'hits': 0, 'renders': 0}
+
+    def photo(self, kind, size, *args):
+        key = (kind, int(size[0]), int(size[1])) + args
+        photo = self._lru.get(key)
+        if photo is not None:
+            self._lru.move_to_end(key)
+            self.stats['hits'] += 1
+            return photo
+        photo = ImageTk.PhotoImage(asset(kind, size, *args))
+        self.stats['renders'] += 1
+        self._lru[key] = photo
+        self._bytes += photo.width() * photo.height() * 4
+        while self._bytes > self.max_bytes and len(self._lru) > 1:
+            _, old = self._lru.popitem(last=False)
+            self._bytes -= old.width() * old.height() * 4
+        return photo
+
+    def button_states(self, size, normal, hover, pressed=None, border=None):
+        """{'normal', 'hover', 'pressed'} images for one button look."""
+        return {
+            'normal': self.photo('button', size, normal, border),
+            'hover': self.photo('button', size, hover, border),
+            'pressed': self.photo('button', size, pressed or hover, border),
+        }
+
+
+_shared = None
+
+
+def shared():
+    """Process-wide ThemeCache, created on first use (needs a Tk root)."""
+    global _shared
+    if _shared is None:
+        _shared = ThemeCache()
+    return _shared
+
+
+def paint_gradient(canvas, start, end, vertical=False, tag="gradient"):
+    """
+    Keep `canvas` filled with one gradient image item, lowered beneath the
+    rest of its items. Re-rendered only when the canvas size changes.
+    """
+    state = {'size': None, 'job': None, 'photo': None}
+
+    def render():
+        state['job'] = None
+        size = (canvas.winfo_width(), canvas.winfo_height())
+        if size == state['size'] or min(size) < 2: return
+        state['size'] = size
+        state['photo'] = shared().photo('gradient', size, start, end, vertical)
+        if canvas.find_withtag(tag):
+            canvas.itemconfigure(tag, image=state['photo'])
+        else:
+            canvas.create_image(0, 0, image=state['photo'], anchor="nw", tags=tag)
+        canvas.tag_lower(tag)
+
+    def on_configure(e=None):
+        if state['job']: canvas.after_cancel(state['job'])
+        state['job'] = canvas.after(RESIZE_DELAY_MS, render)
+
+    canvas.bind("<Configure>", on_configure, add="+")
+    canvas.after_idle(render)
+    return state
+
+
+def theme_button(button, size, normal, hover, pressed=None, border=None):
+    """Give a tk.Button pre-rendered normal/hover/pressed backgrounds (text drawn on top)."""
+    states = shared().button_states(size, normal, hover, pressed, border)
+    button.config(image=states['normal'], compound="center", bd=0, highlightthickness=0,
+                  padx=0, pady=0, bg=button.master.cget("bg"), activebackground=button.master.cget("bg"))
+    button.bind("<Enter>", lambda e: button.config(image=states['hover']), add="+")
+    button.bind("<Leave>", lambda e: button.config(image=states['normal']), add="+")
+    button.bind("<ButtonPress-1>", lambda e: button.config(image=states['pressed']), add="+")
+    button.bind("<ButtonRelease-1>", lambda e: button.config(image=states['hover']), add="+")
+    button.theme_states = states # keep the PhotoImages alive with the widget
+    return states
+
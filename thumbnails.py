@@ -0,0 +1,154 @@
+"""
+Product thumbnails.
+
+Resized thumbnails are cached on disk (keyed by source path + mtime + size)
+so full-size photos are decoded once, not on every refresh. ThumbnailLoader
+decodes in a thread pool and hands finished PhotoImages back to the Tk
+thread via after(), keeping them in a byte-bounded LRU.
+
+Warm the disk cache after seeding inventory:
+
+    python thumbnails.py --warm
+"""
+import hashlib
+import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageTk
+
+THUMB_SIZE = (140, 140)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".thumb_cache")
+
+
+def cache_path(path, size=THUMB_SIZE, cache_dir=CACHE_DIR):
+    st = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{size[0]}x{size[1]}"
+    return os.path.join(cache_dir, hashlib.sha1(raw.encode("utf-8")).hexdigest() + ".png")
+
+
+def make_thumbnail(path, size=THUMB_SIZE, cache_dir=CACHE_DIR):
+    """Return the resized PIL image for `path`, building the disk cache entry if missing."""
+    target = cache_path(path, size, cache_dir)
+    if os.path.exists(target):
+        with Image.open(target) as img:
+            img.load()
+            return img
+
+    with Image.open(path) as src:
+        src.draft("RGB", size) # lets JPEG decode at reduced scale
+        img = src.convert("RGB").resize(size, Image.LANCZOS)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    img.save(tmp, "PNG")
+    os.replace(tmp, target)
+    return img
+
+
+class ThumbnailLoader:
+    def __init__(self, widget, size=THUMB_SIZE, max_bytes=64 * 1024 * 1024, workers=4, cache_dir=CACHE_DIR):
+        self.widget = widget # any Tk widget, used for after()
+        self.size = size
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._lru = OrderedDict() # (path, mtime) -> PhotoImage
+        self._bytes = 0
+        self._waiting = {}        # (path, mtime) -> [callbacks]
+        self._done = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+        self._polling = False
+
+    def request(self, path, callback):
+        """
+        Return the PhotoImage if it is already in memory. Otherwise start
+        decoding, return None, and call callback(photo_or_None) on the Tk
+        thread once it is ready.
+        """
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except OSError:
+            return None
+
+        photo = self._lru.get(key)
+        if photo is not None:
+            self._lru.move_to_end(key)
+            return photo
+
+        if key in self._waiting:
+            self._waiting[key].append(callback)
+        else:
+            self._waiting[key] = [callback]
+            self._pool.submit(self._decode, key)
+            if not self._polling:
+                self._polling = True
+                self.widget.after(20, self._poll)
+        return None
+
+    def _decode(self, key):
+        try:
+            img = make_thumbnail(key[0], self.size, self.cache_dir)
+        except Exception:
+            img = None
+        self._done.put((key, img))
+
+    def _poll(self):
+        while True:
+            try:
+                key, img = self._done.get_nowait()
+            except queue.Empty:
+                break
+            photo = self._remember(key, img) if img is not None else None
+            for cb in self._waiting.pop(key, []):
+                cb(photo)
+
+        if self._waiting:
+            self.widget.after(20, self._poll)
+        else:
+            self._polling = False
+
+    def _remember(self, key, img):
+        # PhotoImage must be created on the Tk thread
+        photo = ImageTk.PhotoImage(img)
+        self._lru[key] = photo
+        self._bytes += photo.width() * photo.height() * 4
+        while self._bytes > self.max_bytes and len(self._lru) > 1:
+            _, old = self._lru.popitem(last=False)
+            self._bytes -= old.width() * old.height() * 4
+        return photo
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def warm_cache(db=None, workers=8):
+    """Pre-build disk thumbnails for every inventory image. Returns (built, failed)."""
+    if db is None:
+        from db_manager import open_db
+        db = open_db()
+    paths = {i['image_path'] for i in db.fetch_inventory() if i.get('image_path') and os.path.exists(i['image_path'])}
+
+    def build(path):
+        try:
+            make_thumbnail(path)
+            return True
+        except Exception as e:
+            print(f" - {path}: {e}")
+            return False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(build, paths))
+    return sum(results), len(results) - sum(results)
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="SmartFit thumbnail cache")
+    ap.add_argument("--warm", action="store_true", help="pre-build thumbnails for all inventory images")
+    args = ap.parse_args()
+    if args.warm:
+        built, failed = warm_cache()
+        print(f"[OK] {built} thumbnails cached, {failed} failed.")
+    else:
+        ap.print_help()
@@ -0,0 +1,74 @@
+class VirtualGrid:
+    """
+    Fixed-size cell grid drawn straight onto a Canvas that only materializes
+    the rows in (and just around) the viewport.
+
+    Cells are created with make_cell(parent) and recycled as the user scrolls:
+    bind_cell(cell, item) is called whenever a cell is moved to a new index.
+    The scrollregion comes from the item count, never from bbox("all").
+    """
+
+    def __init__(self, canvas, make_cell, bind_cell, cell_w, cell_h, cols, overscan=1):
+        self.canvas = canvas
+        self.make_cell = make_cell
+        self.bind_cell = bind_cell
+        self.cell_w = cell_w
+        self.cell_h = cell_h
+        self.cols = cols
+        self.overscan = overscan
+        self.items = []
+        self.live = {}  # item index -> (cell, window id)
+        self.spare = [] # recycled (cell, window id) parked off-screen
+
+    def rows(self):
+        return (len(self.items) + self.cols - 1) // self.cols
+
+    def set_items(self, items):
+        self.items = items
+        self.canvas.configure(scrollregion=(0, 0, self.cols * self.cell_w, self.rows() * self.cell_h))
+        # Indices now point at different items: rebind everything on screen
+        for idx in list(self.live):
+            self._park(idx)
+        self.update_view()
+
+    def update_view(self):
+        if not self.items:
+            return
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.cell_h)
+        first = max(0, int(top // self.cell_h) - self.overscan)
+        last = min(self.rows() - 1, int((top + height) // self.cell_h) + self.overscan)
+        wanted = range(first * self.cols, min(len(self.items), (last + 1) * self.cols))
+
+        for idx in list(self.live):
+            if idx not in wanted:
+                self._park(idx)
+        for idx in wanted:
+            if idx not in self.live:
+                self._place(idx)
+
+    def _place(self, idx):
+        r, c = divmod(idx, self.cols)
+        x, y = c * self.cell_w + 10, r * self.cell_h + 10 # 10px gutter, as in the frame grid
+        if self.spare:
+            cell, wid = self.spare.pop()
+            self.canvas.coords(wid, x, y)
+        else:
+            cell = self.make_cell(self.canvas)
+            wid = self.canvas.create_window(x, y, window=cell, anchor="nw", width=self.cell_w - 20, height=self.cell_h - 20)
+        self.bind_cell(cell, self.items[idx])
+        self.live[idx] = (cell, wid)
+
+    def _park(self, idx):
+        cell, wid = self.live.pop(idx)
+        self.canvas.coords(wid, -10 * self.cell_w, -10 * self.cell_h)
+        self.spare.append((cell, wid))
+
+    def cells(self):
+        return [cell for cell, _ in self.live.values()]
+
+    def clear(self):
+        for cell, wid in list(self.live.values()) + self.spare:
+            self.canvas.delete(wid)
+            cell.destroy()
+        self.live, self.spare, self.items = {}, [], []